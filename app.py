@@ -1,15 +1,20 @@
+import functools
+import os
+
+import pandas as pd
 import streamlit as st
-import plotly.express as px
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 
-from scripts.data_loader import (
-    load_passenger_flow,
-    load_cargo_flow,
-    load_governance_flags,
-    load_opportunity_scores
-)
-from scripts.pipeline import run_scoring_pipeline
+from scripts.charts import CHARTS, build_bar_figure, chart_figure, rank_interval_figure
+from scripts.country_index import ALL_COUNTRIES
+from scripts.data_loader import available_years, load_country_index, load_rollup
+from scripts.instrumentation import RerunMonitor, cache_stats, recent_events
+from scripts.pipeline import GOVERNANCE_THRESHOLD
+from scripts.refresh import PipelineRefresher, last_refreshed
+from scripts.scenarios import Scenario, load_scenario_engine
+from scripts.sensitivity import load_sensitivity
+from scripts.scoring import FLAG_WEIGHTS, get_sector_score
 
 
 # =====================================================
@@ -20,6 +25,40 @@ st.set_page_config(
     layout="wide"
 )
 
+# Diagnostics are opt-in: ?diagnostics=1 or ALGOECON_DIAGNOSTICS=1
+DIAGNOSTICS = (
+    st.query_params.get("diagnostics") == "1"
+    or os.environ.get("ALGOECON_DIAGNOSTICS") == "1"
+)
+
+
+def profile_reruns():
+    return DIAGNOSTICS and st.session_state.get("profile_rerun", False)
+
+
+def monitored(fragment):
+    """
+    Time every run of a fragment body, like full reruns.
+
+    Fragment-only reruns (widget interactions inside the fragment) are
+    profiled when profiling is on, with the report shown in the fragment.
+    """
+    @functools.wraps(fragment)
+    def run(*args, **kwargs):
+        monitor = RerunMonitor(profile=profile_reruns(), fragment=fragment.__name__)
+        try:
+            result = fragment(*args, **kwargs)
+        finally:
+            report = monitor.finish()
+        if report:
+            with st.expander(f"Profile of this {fragment.__name__} rerun"):
+                st.code(report, language="text")
+        return result
+    return run
+
+
+rerun_monitor = RerunMonitor(profile=profile_reruns())
+
 # =====================================================
 # Global Styling (Minimal / Professional)
 # =====================================================
@@ -63,6 +102,7 @@ h2 {
 # =====================================================
 AVIATION_COLOR = "#2563EB"   # Professional blue
 TOURISM_COLOR = "#059669"    # Professional green
+SCENARIO_COLOR = "#7C3AED"   # Professional violet
 
 
 # =====================================================
@@ -84,9 +124,40 @@ with col_text:
         unsafe_allow_html=True
     )
 
+
+# =====================================================
+# Scoring Pipeline (background refresh, once per process)
+# =====================================================
+@st.cache_resource
+def start_pipeline_refresher():
+    # Loader caches are keyed on dataset versions and invalidated by the
+    # pipeline itself, so no cache clearing is needed here
+    return PipelineRefresher().start()
+
+
+start_pipeline_refresher()
+
+
+def format_age(updated_at):
+    minutes = int((datetime.now(timezone.utc) - updated_at).total_seconds() // 60)
+    if minutes < 1:
+        return "just now"
+    if minutes < 60:
+        return f"{minutes} min ago"
+    if minutes < 24 * 60:
+        return f"{minutes // 60} h ago"
+    return f"{minutes // (24 * 60)} d ago"
+
+
+updated_at = last_refreshed()
+if updated_at is not None:
+    last_updated = f"{updated_at.strftime('%d %b %Y, %H:%M UTC')} ({format_age(updated_at)})"
+else:
+    last_updated = "never"
+
 st.markdown(
     f"<div style='color:#9ca3af; font-size:0.8rem;'>"
-    f"Last updated: {datetime.utcnow().strftime('%d %b %Y, %H:%M UTC')}"
+    f"Last updated: {last_updated}"
     f"</div>",
     unsafe_allow_html=True
 )
@@ -125,83 +196,37 @@ def summary_box(title, value, subtitle="", color="#2563EB"):
     """, unsafe_allow_html=True)
 
 
-# =====================================================
-# Run Scoring Pipeline
-# =====================================================
-try:
-    run_scoring_pipeline()
-except Exception:
-    pass
-
-
 # =====================================================
 # Load Data
 # =====================================================
-passenger_df = load_passenger_flow()
-cargo_df = load_cargo_flow()
-governance_df = load_governance_flags()
-opportunity_df = load_opportunity_scores()
-
-
-# =====================================================
-# Country Selector
-# =====================================================
-countries = sorted(
-    set(passenger_df.get("country", []))
-    | set(cargo_df.get("country", []))
-    | set(governance_df.get("country", []))
-    | set(opportunity_df.get("country", []))
-)
-
-selected_country = st.selectbox(
-    "Country",
-    ["All"] + countries,
-    label_visibility="collapsed"
-)
-
-def filter_df(df):
-    if selected_country == "All" or df.empty:
-        return df
-    return df[df["country"] == selected_country]
-
-passenger_df = filter_df(passenger_df)
-cargo_df = filter_df(cargo_df)
-governance_df = filter_df(governance_df)
-opportunity_df = filter_df(opportunity_df)
+_, load_errors = load_country_index()
 
-
-# =====================================================
-# Tabs
-# =====================================================
-tab1, tab2 = st.tabs(["Aviation", "Tourism & Hospitality"])
+# Missing optional datasets are expected; unreadable or malformed ones are not
+for error in load_errors:
+    if error.kind != "missing":
+        st.warning(f"Could not load {error.dataset}: {error.message}")
 
 
 # =====================================================
 # Aviation
 # =====================================================
-with tab1:
+@st.fragment
+@monitored
+def aviation_tab(country_index, selected_country, selected_year):
+    passenger_rollup = load_rollup("passenger_flow")
+    opportunity_df = country_index.select("opportunity_scores", selected_country)
+
     st.markdown("<h2>Aviation</h2>", unsafe_allow_html=True)
 
-    if not passenger_df.empty:
+    if passenger_rollup.has_country(selected_country):
         summary_box(
             "Passenger Volume",
-            f"{passenger_df['passenger_volume'].sum():,}",
+            f"{passenger_rollup.total(selected_country):,}",
             "Annual passengers",
             AVIATION_COLOR
         )
 
-        fig = px.bar(
-            passenger_df,
-            x="country",
-            y="passenger_volume",
-            color_discrete_sequence=[AVIATION_COLOR]
-        )
-        fig.update_layout(
-            title="Passenger Volume by Country",
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=12)
-        )
+        fig = chart_figure("passenger_volume", selected_country, AVIATION_COLOR, year=selected_year)
         st.plotly_chart(fig, use_container_width=True)
 
     if not opportunity_df.empty and "sector" in opportunity_df.columns:
@@ -215,15 +240,13 @@ with tab1:
                 AVIATION_COLOR
             )
 
-            fig = px.bar(
-                aviation_scores,
-                x="country",
-                y="procurement_readiness_score",
-                color_discrete_sequence=[AVIATION_COLOR]
-            )
-            fig.update_layout(
+            fig = chart_figure(
+                "procurement_readiness",
+                selected_country,
+                AVIATION_COLOR,
+                sector="Aviation",
                 title="Aviation Procurement Readiness",
-                plot_bgcolor="rgba(0,0,0,0)"
+                year=selected_year
             )
             st.plotly_chart(fig, use_container_width=True)
 
@@ -231,9 +254,42 @@ with tab1:
 # =====================================================
 # Tourism
 # =====================================================
-with tab2:
+@st.fragment
+@monitored
+def tourism_tab(country_index, selected_country, selected_year):
+    # Precomputed by the pipeline: inbound volumes joined with tourism scores
+    view_df = country_index.select("tourism_view", selected_country)
+    opportunity_df = country_index.select("opportunity_scores", selected_country)
+
     st.markdown("<h2>Tourism & Hospitality</h2>", unsafe_allow_html=True)
 
+    if not view_df.empty and view_df["inbound_tourists"].notna().any():
+        summary_box(
+            "Inbound Tourists",
+            f"{view_df['inbound_tourists'].sum():,.0f}",
+            "Latest year available",
+            TOURISM_COLOR
+        )
+
+        volume = view_df["inbound_tourists"].astype(float)
+        readiness = view_df["procurement_readiness_score"].astype(float)
+        weighted = volume.notna() & readiness.notna()
+        summary_box(
+            "Volume-weighted Readiness",
+            f"{(readiness * volume)[weighted].sum() / volume[weighted].sum():.1f}/100",
+            "Readiness weighted by inbound tourists",
+            TOURISM_COLOR
+        )
+
+        fig = chart_figure(
+            "tourism_opportunity",
+            selected_country,
+            TOURISM_COLOR,
+            title="Tourism Opportunity Size (inbound tourists x readiness)",
+            year=selected_year
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
     if not opportunity_df.empty and "sector" in opportunity_df.columns:
         tourism_scores = opportunity_df[
             opportunity_df["sector"] == "Tourism & Hospitality"
@@ -247,19 +303,212 @@ with tab2:
                 TOURISM_COLOR
             )
 
-            fig = px.bar(
-                tourism_scores,
-                x="country",
-                y="procurement_readiness_score",
-                color_discrete_sequence=[TOURISM_COLOR]
-            )
-            fig.update_layout(
+            fig = chart_figure(
+                "procurement_readiness",
+                selected_country,
+                TOURISM_COLOR,
+                sector="Tourism & Hospitality",
                 title="Tourism Procurement Readiness",
-                plot_bgcolor="rgba(0,0,0,0)"
+                year=selected_year
             )
             st.plotly_chart(fig, use_container_width=True)
 
 
+# =====================================================
+# Scenarios (what-if scoring config, in memory only)
+# =====================================================
+def set_scenario_modifier(country):
+    st.session_state.setdefault("scenario_modifiers", {})[country] = st.session_state[f"scenario_modifier_{country}"]
+
+
+def reset_scenario():
+    for key in list(st.session_state):
+        if key.startswith("scenario_"):
+            del st.session_state[key]
+
+
+@st.fragment
+@monitored
+def scenarios_tab(selected_country, selected_year):
+    engine = load_scenario_engine(selected_year)
+
+    st.markdown("<h2>Scenarios</h2>", unsafe_allow_html=True)
+
+    if engine is None:
+        st.info("No governance flags inputs to build scenarios from.")
+        return
+
+    st.caption(
+        "Adjust the scoring config to see how country rankings change. "
+        "Scenarios are computed in memory; nothing is written to disk."
+    )
+
+    col_weights, col_sectors = st.columns(2)
+
+    with col_weights:
+        st.markdown("**Flag weights**")
+        flag_weights = {
+            flag: st.slider(flag.replace("_", " ").title(), 0.0, 1.0, weight, 0.05, key=f"scenario_weight_{flag}")
+            for flag, weight in FLAG_WEIGHTS.items()
+        }
+        threshold = st.slider(
+            "HIGH governance threshold", 0.0, 1.0, GOVERNANCE_THRESHOLD, 0.05, key="scenario_threshold"
+        )
+
+    with col_sectors:
+        st.markdown("**Sector scores**")
+        sector_scores = {
+            sector: st.slider(sector, 0.0, 1.0, get_sector_score(sector), 0.05, key=f"scenario_sector_{sector}")
+            for sector in engine.sectors
+        }
+
+        st.markdown("**Country modifier**")
+        countries = list(engine.countries)
+        modifier_country = st.selectbox(
+            "Country modifier for",
+            countries,
+            index=countries.index(selected_country) if selected_country in countries else 0,
+            key="scenario_country",
+            label_visibility="collapsed"
+        )
+        country_modifiers = st.session_state.get("scenario_modifiers", {})
+        st.slider(
+            "Modifier",
+            0.5,
+            1.5,
+            country_modifiers.get(modifier_country, round(engine.country_modifier(modifier_country), 2)),
+            0.01,
+            key=f"scenario_modifier_{modifier_country}",
+            on_change=set_scenario_modifier,
+            args=(modifier_country,)
+        )
+
+    st.button("Reset scenario", on_click=reset_scenario)
+
+    scenario = Scenario.create(flag_weights, sector_scores, country_modifiers, threshold)
+    compared = engine.compare(scenario)
+
+    flag_changes = int((compared["governance_flag"] != compared["baseline_flag"]).sum())
+    rank_changes = int((compared["rank_change"] != 0).sum())
+    summary_box(
+        "Scenario Impact",
+        f"{rank_changes:,} rank changes",
+        f"{flag_changes:,} HIGH/LOW flag changes across {len(compared):,} countries",
+        SCENARIO_COLOR
+    )
+
+    fig = build_bar_figure(
+        compared,
+        CHARTS["procurement_readiness"],
+        SCENARIO_COLOR,
+        title="Scenario Procurement Readiness"
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.dataframe(
+        compared[[
+            "rank", "country", "procurement_readiness_score", "baseline_score",
+            "rank_change", "governance_flag", "baseline_flag",
+        ]].head(100),
+        use_container_width=True,
+        hide_index=True
+    )
+
+
+# =====================================================
+# Sensitivity (rank stability under uncertain weights)
+# =====================================================
+@st.fragment
+@monitored
+def sensitivity_tab(selected_country, selected_year):
+    st.markdown("<h2>Sensitivity</h2>", unsafe_allow_html=True)
+
+    with st.spinner("Sampling scoring assumptions..."):
+        result = load_sensitivity(selected_year)
+
+    if result is None:
+        st.info("No governance flags inputs to analyse.")
+        return
+
+    st.caption(
+        f"{result.samples:,} samples of the flag weights and sector scores, each within "
+        f"±{result.spread:.0%} of its current value. Rank ranges are 5th–95th percentiles."
+    )
+
+    countries = result.countries
+    selected = countries[countries["country"] == selected_country]
+    if not selected.empty:
+        row = selected.iloc[0]
+        summary_box(
+            "Rank Range",
+            f"{row['rank_p05']:.0f}–{row['rank_p95']:.0f}",
+            f"Median rank {row['rank_median']:.0f} · P(HIGH governance) {row['prob_high']:.0%}",
+            SCENARIO_COLOR
+        )
+
+    st.plotly_chart(rank_interval_figure(countries, SCENARIO_COLOR), use_container_width=True)
+
+    st.dataframe(
+        countries.head(100),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "prob_high": st.column_config.ProgressColumn("P(HIGH)", min_value=0.0, max_value=1.0, format="%.2f"),
+            "score_mean": st.column_config.NumberColumn("Mean score", format="%.1f"),
+        }
+    )
+
+
+# =====================================================
+# Country Selector + Tabs
+# =====================================================
+def dashboard_tabs(labels):
+    # Track the selected tab so hidden tabs can be skipped; older Streamlit
+    # versions without tab state render every tab
+    try:
+        return st.tabs(labels, key="dashboard_tab", on_change="rerun")
+    except TypeError:
+        return st.tabs(labels)
+
+
+@st.fragment
+@monitored
+def dashboard():
+    # Widget interactions rerun only this fragment, not the styling, header,
+    # refresher and data loading above
+    years = available_years()
+    selected_year = years[-1] if years else None
+    if len(years) > 1:
+        # Only the selected year's score partitions are loaded
+        selected_year = st.selectbox("Year", years[::-1], label_visibility="collapsed")
+    country_index, _ = load_country_index(selected_year)
+
+    selected_country = st.selectbox(
+        "Country",
+        [ALL_COUNTRIES] + country_index.countries,
+        label_visibility="collapsed"
+    )
+
+    tab1, tab2, tab3, tab4 = dashboard_tabs(["Aviation", "Tourism & Hospitality", "Scenarios", "Sensitivity"])
+
+    # .open is None when tab state isn't tracked
+    if getattr(tab1, "open", None) is not False:
+        with tab1:
+            aviation_tab(country_index, selected_country, selected_year)
+    if getattr(tab2, "open", None) is not False:
+        with tab2:
+            tourism_tab(country_index, selected_country, selected_year)
+    if getattr(tab3, "open", None) is not False:
+        with tab3:
+            scenarios_tab(selected_country, selected_year)
+    if getattr(tab4, "open", None) is not False:
+        with tab4:
+            sensitivity_tab(selected_country, selected_year)
+
+
+dashboard()
+
+
 # =====================================================
 # Footer
 # =====================================================
@@ -268,3 +517,27 @@ st.markdown("""
 Powered by <strong>AlgoCentric AI</strong> · UK–Africa Intelligence Platform
 </div>
 """, unsafe_allow_html=True)
+
+
+# =====================================================
+# Diagnostics (opt-in)
+# =====================================================
+profile_report = rerun_monitor.finish()
+
+if DIAGNOSTICS:
+    with st.expander("Diagnostics"):
+        st.checkbox("Profile reruns (cProfile)", key="profile_rerun")
+
+        st.markdown("**Cache hits / misses**")
+        stats = cache_stats()
+        if stats:
+            st.dataframe(pd.DataFrame.from_dict(stats, orient="index"), use_container_width=True)
+
+        st.markdown("**Recent stages** (this process, newest first)")
+        events = recent_events(limit=100)
+        if events:
+            st.dataframe(pd.DataFrame(events), use_container_width=True, hide_index=True)
+
+        if profile_report:
+            st.markdown("**Profile of this rerun** (top functions by cumulative time)")
+            st.code(profile_report, language="text")
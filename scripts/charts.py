@@ -0,0 +1,171 @@
+"""
+Memoized, server-side aggregated Plotly figures for the dashboard.
+
+Charts are aggregated to one bar per country (top N plus an "Other" bucket)
+before they are built, so the figure sent to the browser stays small no
+matter how many rows the dataset has. Built figures are cached as plain
+dicts keyed on (chart, dataset version, year, country, sector).
+"""
+
+from typing import Dict, NamedTuple, Optional
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from scripts.country_index import ALL_COUNTRIES
+from scripts.data_loader import (
+    CACHE_TTL,
+    FLOW_ROLLUPS,
+    dataset_version,
+    latest_year,
+    load_country_index,
+    load_rollup,
+)
+from scripts.instrumentation import count_cache_call, count_cache_miss, stage
+from scripts.pipeline import register_output_hook
+
+
+# Countries shown individually; the rest are folded into OTHER_LABEL
+TOP_N = 25
+OTHER_LABEL = "Other"
+
+FIGURE_CACHE_MAX_ENTRIES = 256
+
+
+class ChartSpec(NamedTuple):
+    dataset: str
+    value_column: str
+    agg: str  # "sum" or "mean"
+    title: str
+    layout: Dict
+
+
+CHARTS: Dict[str, ChartSpec] = {
+    "passenger_volume": ChartSpec(
+        "passenger_flow",
+        "passenger_volume",
+        "sum",
+        "Passenger Volume by Country",
+        dict(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", font=dict(size=12)),
+    ),
+    "tourism_opportunity": ChartSpec(
+        "tourism_view",
+        "opportunity_size",
+        "sum",
+        "Tourism Opportunity Size by Country",
+        dict(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", font=dict(size=12)),
+    ),
+    "procurement_readiness": ChartSpec(
+        "opportunity_scores",
+        "procurement_readiness_score",
+        "mean",
+        "Procurement Readiness",
+        dict(plot_bgcolor="rgba(0,0,0,0)"),
+    ),
+}
+
+
+def aggregate_by_country(df, value_column, agg="sum", top_n=TOP_N):
+    """
+    Aggregate value_column per country, keeping the top_n countries.
+
+    Remaining countries are combined into one OTHER_LABEL row using the same
+    aggregation (sum of sums, or mean of country means).
+
+    Returns:
+        pd.DataFrame: country, value_column sorted by value descending
+    """
+    per_country = (
+        df.groupby("country", observed=True)[value_column]
+        .agg(agg)
+        .sort_values(ascending=False)
+    )
+    top = per_country.iloc[:top_n]
+    rest = per_country.iloc[top_n:]
+    if not rest.empty:
+        other = rest.sum() if agg == "sum" else rest.mean()
+        top = pd.concat([top.astype(float), pd.Series([other], index=[OTHER_LABEL])])
+    return pd.DataFrame({"country": top.index.astype(str), value_column: top.to_numpy()})
+
+
+def build_bar_figure(df, spec, color, title=None, top_n=TOP_N):
+    """Build a compact bar chart dict for df according to spec."""
+    aggregated = aggregate_by_country(df, spec.value_column, spec.agg, top_n)
+    fig = px.bar(
+        aggregated,
+        x="country",
+        y=spec.value_column,
+        color_discrete_sequence=[color]
+    )
+    fig.update_layout(title=title or spec.title, **spec.layout)
+    return fig.to_dict()
+
+
+def rank_interval_figure(df, color, title="Rank Range (5th-95th percentile)", top_n=TOP_N):
+    """
+    Median rank with 5th-95th percentile error bars for the top_n countries.
+
+    Args:
+        df: Sensitivity results (country, rank_p05, rank_median, rank_p95)
+            sorted by median rank
+    """
+    top = df.head(top_n)
+    fig = px.scatter(
+        top,
+        x="country",
+        y="rank_median",
+        error_y=top["rank_p95"] - top["rank_median"],
+        error_y_minus=top["rank_median"] - top["rank_p05"],
+        color_discrete_sequence=[color]
+    )
+    fig.update_yaxes(autorange="reversed", title="Rank")
+    fig.update_layout(title=title, plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)")
+    return fig.to_dict()
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=FIGURE_CACHE_MAX_ENTRIES)
+def _cached_figure(chart, version, year, country, sector, color, title):
+    count_cache_miss(f"figure:{chart}")
+    spec = CHARTS[chart]
+    if spec.dataset in FLOW_ROLLUPS and spec.agg == "sum" and sector is None:
+        # Sums of the rollup equal sums of the raw rows
+        rollup = load_rollup(spec.dataset)
+        df = rollup.table if country == ALL_COUNTRIES else rollup.table[rollup.table["country"] == country]
+    else:
+        country_index, _ = load_country_index(year)
+        df = country_index.select(spec.dataset, country)
+    if sector is not None:
+        df = df[df["sector"] == sector]
+    if df.empty:
+        return None
+    with stage("chart_build", chart=chart, country=country, rows=len(df)):
+        return build_bar_figure(df, spec, color, title)
+
+
+def chart_figure(
+    chart: str,
+    country: str,
+    color: str,
+    sector: Optional[str] = None,
+    title: Optional[str] = None,
+    year: Optional[int] = None,
+) -> Optional[dict]:
+    """
+    Return the cached figure dict for a chart, or None if there is no data.
+
+    Args:
+        chart: Key of CHARTS
+        country: Selected country ("All" for every country)
+        color: Bar color
+        sector: Optional sector filter
+        title: Chart title (default: the chart's own title)
+        year: Year partition for partitioned datasets (default: latest)
+    """
+    year = year or latest_year()
+    version = dataset_version(CHARTS[chart].dataset, year)
+    count_cache_call(f"figure:{chart}")
+    return _cached_figure(chart, version, year, country, sector, color, title)
+
+
+register_output_hook(_cached_figure.clear)
@@ -0,0 +1,78 @@
+"""
+Country index over the loaded datasets.
+
+Each dataset is reordered once so that every country's rows are contiguous,
+and the row range of each country is recorded. Selecting a country is then
+a dictionary lookup plus a positional slice instead of a full-column scan.
+Frames already stored grouped by country (the shared cache snapshots) come
+with their row ranges and are sliced in place, without a reordered copy.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+ALL_COUNTRIES = "All"
+
+
+def partition_by_country(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, slice]]:
+    """
+    Reorder df so that each country's rows are contiguous.
+
+    Returns:
+        tuple: (reordered df, {country: slice of its rows})
+    """
+    codes, uniques = pd.factorize(df["country"])
+    # Stable sort keeps each country's rows in their original order
+    order = np.argsort(codes, kind="stable")
+    sorted_df = df.iloc[order]
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    starts = np.searchsorted(codes[order], 0) + np.concatenate(([0], np.cumsum(counts)[:-1]))
+    slices = {
+        country: slice(int(start), int(start + count))
+        for country, start, count in zip(uniques, starts, counts)
+    }
+    return sorted_df, slices
+
+
+class CountryIndex:
+    """
+    Per-dataset country partitions plus the sorted list of all countries.
+
+    Args:
+        frames: {dataset name: DataFrame}; frames without a country column
+            are kept but can only be selected as a whole
+        grouped: {dataset name: {country: slice}} for frames whose rows are
+            already contiguous per country; those frames are not reordered
+    """
+
+    def __init__(
+        self,
+        frames: Dict[str, pd.DataFrame],
+        grouped: Optional[Dict[str, Optional[Dict[str, slice]]]] = None,
+    ):
+        self.frames = frames
+        self._partitions = {}
+        countries = set()
+        for name, df in frames.items():
+            if df.empty or "country" not in df.columns:
+                continue
+            slices = (grouped or {}).get(name)
+            if slices is None:
+                df, slices = partition_by_country(df)
+            self._partitions[name] = (df, slices)
+            countries.update(slices)
+        self.countries: List[str] = sorted(countries)
+
+    def select(self, name: str, country: str = ALL_COUNTRIES) -> pd.DataFrame:
+        """Return dataset name's rows for country (all rows for "All")."""
+        df = self.frames[name]
+        if country == ALL_COUNTRIES or name not in self._partitions:
+            return df
+        sorted_df, slices = self._partitions[name]
+        rows = slices.get(country)
+        if rows is None:
+            return df.iloc[0:0]
+        return sorted_df.iloc[rows]
@@ -1,101 +1,375 @@
 import pandas as pd
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from scripts.country_index import CountryIndex
+from scripts.instrumentation import count_cache_call, count_cache_miss, stage
+from scripts.metrics import FlowRollup
+from scripts.pipeline import BASE_YEAR, DATA_PATH, partition_path, partition_years, register_output_hook
+from scripts.shared_cache import SHARED_CACHE_ENABLED, country_slices, read_snapshot, snapshot_path, write_snapshot
+from scripts.sqlite_store import SQLITE_ENABLED, query, table_version
+from scripts.storage import columnar_path, read_table
+
+
+class DatasetSpec(NamedTuple):
+    """Declarative description of a processed dataset."""
+    file_name: str
+    required_columns: Tuple[str, ...]
+    dtypes: Optional[Dict[str, str]] = None
+    # Files tried in order when file_name is missing or has the wrong structure
+    fallback_files: Tuple[str, ...] = ()
+    # Older column layouts still accepted as-is
+    legacy_columns: Tuple[Tuple[str, ...], ...] = ()
+    # Pipeline output stored per year partition (see pipeline.partition_path)
+    partitioned: bool = False
+    # Table in the SQLite store (see sqlite_store), read instead of the files when enabled
+    table: Optional[str] = None
+
+
+class DatasetError(NamedTuple):
+    """Why a dataset could not be loaded."""
+    dataset: str
+    kind: str  # "missing", "schema" or "read"
+    message: str
+
+
+DATASETS: Dict[str, DatasetSpec] = {
+    "passenger_flow": DatasetSpec(
+        "fact_route_passenger_flow.csv",
+        ("country", "year", "passenger_volume"),
+        dtypes={"country": "category", "year": "int16", "passenger_volume": "int64"},
+    ),
+    "cargo_flow": DatasetSpec(
+        "fact_route_cargo_flow.csv",
+        ("country", "year", "cargo_tonnage"),
+        dtypes={"country": "category", "year": "int16", "cargo_tonnage": "float64"},
+    ),
+    "governance_flags": DatasetSpec(
+        "fact_governance_flags.csv",
+        ("country", "year", "governance_flag"),
+        dtypes={"country": "category", "year": "int16", "governance_flag": "category"},
+        partitioned=True,
+        table="governance_flags",
+    ),
+    "opportunity_scores": DatasetSpec(
+        "fact_uk_africa_aviation_opportunity.csv",
+        ("country", "year", "sector", "procurement_readiness_score"),
+        dtypes={"country": "category", "year": "int16", "sector": "category",
+                "procurement_readiness_score": "float32"},
+        legacy_columns=(("country", "year", "aviation_score", "tourism_score", "combined_opportunity_score"),),
+        partitioned=True,
+        table="opportunity_scores",
+    ),
+    "tourism_inbound": DatasetSpec(
+        "fact_tourism_inbound.csv",
+        ("country", "year", "inbound_tourists"),
+        dtypes={"country": "category", "year": "int16", "inbound_tourists": "int64"},
+    ),
+    # Materialized by the pipeline (see views.build_tourism_view)
+    "tourism_view": DatasetSpec(
+        "fact_tourism_opportunity_view.csv",
+        ("country", "year", "inbound_tourists", "procurement_readiness_score", "governance_flag",
+         "inbound_share", "weighted_readiness", "opportunity_size"),
+        dtypes={"country": "category", "year": "int16", "governance_flag": "category"},
+        partitioned=True,
+    ),
+}
+
+
+def available_years(data_path: Optional[Path] = None) -> List[int]:
+    """Year partitions of the pipeline outputs, oldest first."""
+    return partition_years(data_path or DATA_PATH)
+
+
+def latest_year(data_path: Optional[Path] = None) -> int:
+    """Most recent year partition of the pipeline outputs."""
+    return max(available_years(data_path), default=BASE_YEAR)
+
+
+def dataset_path(name: str, data_path: Optional[Path] = None, year: Optional[int] = None) -> Path:
+    """Directory holding a dataset; partitioned datasets are read from one year only."""
+    data_path = data_path or DATA_PATH
+    if not DATASETS[name].partitioned:
+        return data_path
+    return partition_path(data_path, year or latest_year(data_path))
+
+
+def load_dataset(
+    name: str,
+    data_path: Optional[Path] = None,
+    year: Optional[int] = None,
+) -> Tuple[pd.DataFrame, Optional[DatasetError]]:
+    """
+    Load one registered dataset, trying its fallback files in order.
+
+    Partitioned datasets are read from the given year's partition only
+    (default: the latest year). With the SQLite store enabled, datasets it
+    holds are queried from it instead, falling back to the files when the
+    year was never stored.
+
+    Returns:
+        tuple: (df, error) where df is empty and error set if no file loaded
+    """
+    spec = DATASETS[name]
+    if SQLITE_ENABLED and spec.table is not None:
+        root = data_path or DATA_PATH
+        year = year or latest_year(root)
+        if table_version(root, spec.table, year) is not None:
+            with stage("load", dataset=name, source="sqlite") as record:
+                df = query(root, spec.table, year, dtypes=spec.dtypes)
+                record["rows"] = len(df)
+            return df, None
+
+    data_path = dataset_path(name, data_path, year)
+    error = DatasetError(name, "missing", f"{spec.file_name} not found")
+
+    with stage("load", dataset=name) as record:
+        for file_name in (spec.file_name,) + spec.fallback_files:
+            file_path = data_path / file_name
+            if not file_path.exists():
+                continue
+            try:
+                df = read_table(file_path, dtypes=spec.dtypes)
+            except Exception as e:
+                error = DatasetError(name, "read", f"{file_name}: {e}")
+                continue
+
+            layouts = (spec.required_columns,) + spec.legacy_columns
+            if any(all(col in df.columns for col in layout) for layout in layouts):
+                record.update(file=file_name, rows=len(df))
+                return df, None
+            missing = [col for col in spec.required_columns if col not in df.columns]
+            error = DatasetError(name, "schema", f"{file_name} missing required columns: {missing}")
+
+        record.update(status=error.kind, error=error.message, rows=0)
+    return pd.DataFrame(), error
+
+
+def load_shared_dataset(
+    name: str,
+    year: Optional[int] = None,
+) -> Tuple[pd.DataFrame, Optional[DatasetError]]:
+    """
+    Load a dataset from DATA_PATH through the cross-process shared cache.
+
+    The current version's shared snapshot is memory-mapped when another
+    process already materialized it; otherwise the dataset is loaded with
+    load_dataset and materialized for the others (see shared_cache). The
+    returned frame may be backed by read-only shared pages: do not modify it.
+
+    Returns:
+        tuple: (df, error) as for load_dataset
+    """
+    spec = DATASETS[name]
+    year = year or latest_year()
+    version = dataset_version(name, year)
+    if not SHARED_CACHE_ENABLED or not version:
+        return load_dataset(name, year=year)
+    path = snapshot_path(DATA_PATH, name, year if spec.partitioned else None, version)
+    count_cache_call(f"shared:{name}")
+    df = read_snapshot(path)
+    if df is not None:
+        return df, None
+    count_cache_miss(f"shared:{name}")
+    df, error = load_dataset(name, year=year)
+    if error is not None:
+        return df, error
+    return write_snapshot(df, path), None
+
+
+def load_datasets(
+    names=None,
+    max_workers=None,
+    data_path: Optional[Path] = None,
+    year: Optional[int] = None,
+    shared: bool = False,
+) -> Tuple[Dict[str, pd.DataFrame], List[DatasetError]]:
+    """
+    Load registered datasets in parallel.
+
+    Args:
+        names: Datasets to load (default: all of DATASETS)
+        max_workers: Thread pool size (default: one thread per dataset)
+        data_path: Directory to load from (default: DATA_PATH)
+        year: Year partition for partitioned datasets (default: latest)
+        shared: Load through the shared cache (see load_shared_dataset);
+            data_path must then be left at DATA_PATH
+
+    Returns:
+        tuple: ({name: df}, [DatasetError, ...])
+    """
+    names = list(names or DATASETS)
+    year = year or latest_year(data_path)
+    if shared:
+        def load(name):
+            return load_shared_dataset(name, year)
+    else:
+        def load(name):
+            return load_dataset(name, data_path, year)
+    with ThreadPoolExecutor(max_workers=max_workers or len(names)) as pool:
+        results = list(pool.map(load, names))
+    frames = {name: df for name, (df, _) in zip(names, results)}
+    errors = [error for _, error in results if error is not None]
+    return frames, errors
+
+
+def dataset_version(name: str, year: Optional[int] = None) -> Tuple:
+    """
+    Cheap version token for a dataset: (file, mtime, size) of each candidate file.
+
+    The token changes whenever the pipeline rewrites the dataset's CSV or its
+    columnar snapshot, so cached loads keyed on it never go stale.
+    """
+    spec = DATASETS[name]
+    data_path = dataset_path(name, year=year)
+    token = []
+    if SQLITE_ENABLED and spec.table is not None:
+        token.append(("sqlite", spec.table, table_version(DATA_PATH, spec.table, year or latest_year())))
+    for file_name in (spec.file_name,) + spec.fallback_files:
+        for path in (data_path / file_name, columnar_path(data_path / file_name)):
+            try:
+                stat = path.stat()
+                token.append((path.name, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                pass
+    return tuple(token)
+
+
+# Bound cache memory: entries expire after CACHE_TTL seconds and at most
+# CACHE_MAX_ENTRIES versions are kept per cached function
+CACHE_TTL = 3600
+CACHE_MAX_ENTRIES = 16
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+def _load_all_cached(versions, year):
+    count_cache_miss("all_datasets")
+    return load_datasets(year=year, shared=True)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+def _load_dataset_cached(name, year, version):
+    count_cache_miss(name)
+    return load_shared_dataset(name, year)[0]
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+def _country_index_cached(versions, year):
+    count_cache_miss("country_index")
+    frames, errors = load_datasets(year=year, shared=True)
+    # Shared snapshots are stored grouped by country, so they are indexed without a copy
+    grouped = {name: country_slices(df) for name, df in frames.items()}
+    return CountryIndex(frames, grouped), errors
+
+
+# Route flow datasets rolled up by country × year (× route): name -> measure
+FLOW_ROLLUPS = {
+    "passenger_flow": "passenger_volume",
+    "cargo_flow": "cargo_tonnage",
+}
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+def _rollup_cached(name, version):
+    count_cache_miss(f"rollup:{name}")
+    # Built from the already-loaded frame rather than rereading the file
+    country_index, _ = load_country_index()
+    with stage("rollup", dataset=name, rows=len(country_index.frames[name])):
+        return FlowRollup(country_index.frames[name], FLOW_ROLLUPS[name])
+
+
+def invalidate_cache():
+    """Drop all cached dataset loads (called by the pipeline after it writes)."""
+    _load_all_cached.clear()
+    _load_dataset_cached.clear()
+    _country_index_cached.clear()
+    _rollup_cached.clear()
+
+
+register_output_hook(invalidate_cache)
+
+
+def load_all_datasets(year=None):
+    """Load every registered dataset concurrently (cached per dataset version)."""
+    year = year or latest_year()
+    versions = tuple(dataset_version(name, year) for name in DATASETS)
+    count_cache_call("all_datasets")
+    return _load_all_cached(versions, year)
+
+
+def load_country_index(year=None):
+    """
+    Load every dataset into a shared, read-only CountryIndex.
+
+    Cached as a resource (no per-rerun copy) per dataset version, over
+    frames memory-mapped from the shared cache, whose rows are grouped by
+    country; callers must not modify the returned frames.
+
+    Args:
+        year: Year partition for partitioned datasets (default: latest)
+
+    Returns:
+        tuple: (CountryIndex, [DatasetError, ...])
+    """
+    year = year or latest_year()
+    versions = tuple(dataset_version(name, year) for name in DATASETS)
+    count_cache_call("country_index")
+    return _country_index_cached(versions, year)
+
+
+def _cached_dataset(name, year=None):
+    year = year or latest_year()
+    count_cache_call(name)
+    return _load_dataset_cached(name, year, dataset_version(name, year))
+
+
+def load_rollup(name):
+    """
+    Load the FlowRollup of a route flow dataset (see FLOW_ROLLUPS).
+
+    Built once per dataset version and shared read-only across sessions.
+    """
+    count_cache_call(f"rollup:{name}")
+    return _rollup_cached(name, dataset_version(name))
+
+
+def load_country_rows(name, country, year=None):
+    """
+    One country's rows of a dataset.
+
+    Runs an indexed query against the SQLite store when it is enabled and
+    holds the dataset, and otherwise slices the cached CountryIndex.
+    """
+    spec = DATASETS[name]
+    year = year or latest_year()
+    if SQLITE_ENABLED and spec.table is not None and table_version(DATA_PATH, spec.table, year) is not None:
+        return query(DATA_PATH, spec.table, year, country=country, dtypes=spec.dtypes)
+    country_index, _ = load_country_index(year)
+    return country_index.select(name, country)
 
 
-@st.cache_data
 def load_passenger_flow():
     """Load passenger flow data from CSV."""
-    file_path = Path(__file__).parent.parent / "data" / "processed" / "fact_route_passenger_flow.csv"
-    
-    try:
-        if not file_path.exists():
-            return pd.DataFrame()
-        df = pd.read_csv(file_path)
-        
-        # Validate required columns
-        required_columns = ['country', 'year', 'passenger_volume']
-        if not all(col in df.columns for col in required_columns):
-            raise ValueError(f"Missing required columns. Expected: {required_columns}")
-        
-        return df
-    except FileNotFoundError:
-        return pd.DataFrame()
-    except Exception as e:
-        return pd.DataFrame()
-
-
-@st.cache_data
+    return _cached_dataset("passenger_flow")
+
+
 def load_cargo_flow():
     """Load cargo flow data from CSV."""
-    file_path = Path(__file__).parent.parent / "data" / "processed" / "fact_route_cargo_flow.csv"
-    
-    try:
-        if not file_path.exists():
-            return pd.DataFrame()
-        df = pd.read_csv(file_path)
-        
-        # Validate required columns
-        required_columns = ['country', 'year', 'cargo_tonnage']
-        if not all(col in df.columns for col in required_columns):
-            raise ValueError(f"Missing required columns. Expected: {required_columns}")
-        
-        return df
-    except FileNotFoundError:
-        return pd.DataFrame()
-    except Exception as e:
-        return pd.DataFrame()
-
-
-@st.cache_data
-def load_governance_flags():
-    """Load computed governance flags from CSV."""
-    # Try new governance flags file first, then fall back to old structure
-    file_path = Path(__file__).parent.parent / "data" / "processed" / "fact_governance_flags.csv"
-    
-    try:
-        if not file_path.exists():
-            # Fall back to old file name
-            file_path = Path(__file__).parent.parent / "data" / "processed" / "fact_aviation_governance_flags_computed.csv"
-        
-        if not file_path.exists():
-            return pd.DataFrame()
-            
-        df = pd.read_csv(file_path)
-        
-        # Validate required columns
-        required_columns = ['country', 'year', 'governance_flag']
-        if not all(col in df.columns for col in required_columns):
-            # If the file exists but has wrong structure, return empty
-            return pd.DataFrame()
-        
-        return df
-    except FileNotFoundError:
-        return pd.DataFrame()
-    except Exception as e:
-        return pd.DataFrame()
-
-
-@st.cache_data
-def load_opportunity_scores():
-    """Load computed opportunity scores from CSV."""
-    file_path = Path(__file__).parent.parent / "data" / "processed" / "fact_uk_africa_aviation_opportunity.csv"
-    
-    try:
-        df = pd.read_csv(file_path)
-        
-        # Validate required columns (new structure with sector and procurement_readiness_score)
-        required_columns = ['country', 'year', 'sector', 'procurement_readiness_score']
-        if not all(col in df.columns for col in required_columns):
-            # Try old structure for backward compatibility
-            old_required = ['country', 'year', 'aviation_score', 'tourism_score', 'combined_opportunity_score']
-            if all(col in df.columns for col in old_required):
-                return df
-            raise ValueError(f"Missing required columns. Expected: {required_columns}")
-        
-        return df
-    except FileNotFoundError:
-        return pd.DataFrame()
-    except Exception as e:
-        return pd.DataFrame()
+    return _cached_dataset("cargo_flow")
+
+
+def load_governance_flags(year=None):
+    """Load computed governance flags for one year (default: latest) from CSV."""
+    return _cached_dataset("governance_flags", year)
+
+
+def load_opportunity_scores(year=None):
+    """Load computed opportunity scores for one year (default: latest) from CSV."""
+    return _cached_dataset("opportunity_scores", year)
+
 
+def load_tourism_inbound():
+    """Load inbound tourism volumes from CSV."""
+    return _cached_dataset("tourism_inbound")
@@ -1,51 +1,234 @@
-import pandas as pd
+"""
+Batch scoring command: AI procurement indices for governance flags records.
+
+Reads CSV or NDJSON governance flags records (country, sector, the four
+flags and an optional country_modifier) from files or stdin in chunks,
+appends ai_procurement_index to every record and writes each chunk as soon
+as it is scored, so memory stays bounded by the chunk size however many
+records are piped through. Several input files are scored in parallel
+worker processes. Throughput and peak memory are reported on stderr, which
+keeps stdout free for scored records.
+
+Usage:
+    python scripts/generate_scores.py                       # inputs in data/processed
+    python scripts/generate_scores.py flags.csv other.ndjson --output-dir out/ --workers 2
+    etl_export | python scripts/generate_scores.py - --format ndjson > scored.ndjson
+"""
+
+import argparse
 import sys
-import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+BASE_PATH = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_PATH))
+
+from scripts.instrumentation import stage
+from scripts.pipeline import (
+    DATA_PATH,
+    PARALLEL_MIN_BYTES,
+    computed_file_name,
+    default_workers,
+    input_files,
+    map_inputs,
+)
+from scripts.scoring import FLAG_WEIGHTS, score_frame
+from scripts.storage import atomic_path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+STDIO = "-"
+DEFAULT_CHUNK_SIZE = 100_000
+FORMATS = ("csv", "ndjson")
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+REQUIRED_COLUMNS = ["sector", *FLAG_WEIGHTS]
+
+
+def detect_format(path):
+    """Record format of a path from its suffix ("csv" unless .ndjson/.jsonl)."""
+    return "ndjson" if Path(path).suffix.lower() in NDJSON_SUFFIXES else "csv"
+
+
+def read_chunks(source, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Iterate over DataFrame chunks of a CSV or NDJSON file or text stream."""
+    if fmt == "ndjson":
+        return pd.read_json(source, lines=True, chunksize=chunk_size)
+    return pd.read_csv(source, chunksize=chunk_size)
+
+
+def write_chunk(chunk, out, fmt, first):
+    """Write one scored chunk to a text stream (CSV header on the first chunk only)."""
+    if fmt == "ndjson":
+        text = chunk.to_json(orient="records", lines=True)
+        out.write(text if text.endswith("\n") else text + "\n")
+    else:
+        chunk.to_csv(out, header=first, index=False)
+
+
+def score_stream(source, out, input_format="csv", output_format="csv", chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Score records from source chunk by chunk, writing each chunk to out.
+
+    Args:
+        source: Path or text stream of CSV or NDJSON records
+        out: Text stream for the scored records
+
+    Returns:
+        int: number of records scored
 
-# Add the scripts directory to the path so we can import scoring
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from scoring import calculate_ai_procurement_index
+    Raises:
+        ValueError: If the records lack a required column
+    """
+    rows = 0
+    for i, chunk in enumerate(read_chunks(source, input_format, chunk_size)):
+        missing = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+        if missing:
+            raise ValueError(f"missing required columns: {missing}")
+        chunk["ai_procurement_index"] = score_frame(chunk)
+        write_chunk(chunk, out, output_format, i == 0)
+        rows += len(chunk)
+    return rows
 
-def flags_from_row(row):
-    return {
-        "digital_procurement": bool(row["digital_procurement"]),
-        "open_contracting": bool(row["open_contracting"]),
-        "ai_policy": bool(row["ai_policy"]),
-        "vendor_transparency": bool(row["vendor_transparency"]),
-    }
 
+def score_file(input_path, output_path, input_format=None, output_format=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Score one input ("-" for stdin) into one output ("-" for stdout).
+
+    Runs in a worker process when several files are scored in parallel. A
+    file output is written to a temporary file and renamed into place when
+    complete, so it never holds partial results.
+
+    Returns:
+        int: number of records scored
+    """
+    input_format = input_format or (detect_format(input_path) if input_path != STDIO else "csv")
+    output_format = output_format or input_format
+    source = sys.stdin if input_path == STDIO else input_path
+    with stage("batch_score", file=str(input_path)) as record:
+        try:
+            rows = _score_to(source, output_path, input_format, output_format, chunk_size)
+        except ValueError as e:
+            raise ValueError(f"{input_path}: {e}") from e
+        record["rows"] = rows
+    return rows
+
+
+def _score_to(source, output_path, input_format, output_format, chunk_size):
+    if output_path == STDIO:
+        rows = score_stream(source, sys.stdout, input_format, output_format, chunk_size)
+        sys.stdout.flush()
+        return rows
+    with atomic_path(Path(output_path)) as tmp, open(tmp, "w", newline="") as out:
+        return score_stream(source, out, input_format, output_format, chunk_size)
+
+
+def output_path_for(input_path, output_dir=None, output_format=None):
+    """<stem>_computed<suffix> in output_dir (default: next to the input)."""
+    input_path = Path(input_path)
+    suffix = input_path.suffix
+    if output_format and output_format != detect_format(input_path):
+        suffix = ".ndjson" if output_format == "ndjson" else ".csv"
+    return Path(output_dir or input_path.parent) / f"{input_path.stem}_computed{suffix}"
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process and its finished workers in MB, or None."""
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+# Kept for callers of the original script
 def compute_scores(input_file, output_file):
+    """Score a whole CSV into output_file and return the scored DataFrame."""
     df = pd.read_csv(input_file)
-    scores = []
-    
-    for _, row in df.iterrows():
-        flags = flags_from_row(row)
-        score = calculate_ai_procurement_index(
-            row["sector"], 
-            flags, 
-            float(row.get("country_modifier", 1.0))
-        )
-        scores.append(score)
-    
-    df["ai_procurement_index"] = scores
+    df["ai_procurement_index"] = score_frame(df)
     df.to_csv(output_file, index=False)
     print(f"Generated {output_file}")
     return df
 
-if __name__ == "__main__":
-    # Get the base directory (parent of scripts)
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    data_dir = os.path.join(base_dir, "data", "processed")
-    
-    print("Generating scores for Aviation...")
-    aviation_input = os.path.join(data_dir, "fact_aviation_governance_flags.csv")
-    aviation_output = os.path.join(data_dir, "fact_aviation_governance_flags_computed.csv")
-    aviation_df = compute_scores(aviation_input, aviation_output)
-    print(aviation_df)
-    
-    print("\nGenerating scores for Tourism & Hospitality...")
-    tourism_input = os.path.join(data_dir, "fact_tourism_governance_flags.csv")
-    tourism_output = os.path.join(data_dir, "fact_tourism_governance_flags_computed.csv")
-    tourism_df = compute_scores(tourism_input, tourism_output)
-    print(tourism_df)
 
+def stream_scores(input_file, output_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Score input_file chunk by chunk, appending to output_file; returns the row count."""
+    rows = score_file(input_file, output_file, chunk_size=chunk_size)
+    print(f"Generated {output_file} ({rows} rows)")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score governance flags records in batches")
+    parser.add_argument(
+        "inputs", nargs="*",
+        help="CSV or NDJSON files, or - for stdin (default: the governance flags inputs in data/processed)",
+    )
+    parser.add_argument("-o", "--output", help="Output file for a single input, or - for stdout")
+    parser.add_argument("--output-dir", help="Directory for <input>_computed outputs (default: next to each input)")
+    parser.add_argument("--format", choices=FORMATS, help="Input format (default: from the suffix; csv for stdin)")
+    parser.add_argument("--output-format", choices=FORMATS, help="Output format (default: the input format)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Records per chunk")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for multiple inputs (default: one per input, up to the CPU count, "
+                             f"or 1 for inputs under {PARALLEL_MIN_BYTES // 2**20} MB)")
+    args = parser.parse_args()
+
+    if args.inputs:
+        inputs = args.inputs
+        outputs = [
+            args.output or (STDIO if path == STDIO else output_path_for(path, args.output_dir, args.output_format))
+            for path in inputs
+        ]
+    else:
+        inputs = [DATA_PATH / name for name in input_files(DATA_PATH)]
+        outputs = [Path(args.output_dir or DATA_PATH) / computed_file_name(path.name) for path in inputs]
+    if len(inputs) > 1 and (args.output or STDIO in inputs):
+        parser.error("--output and stdin (-) take a single input")
+    if not inputs:
+        parser.error(f"no governance flags inputs found in {DATA_PATH}")
+    workers = args.workers
+    if workers is None:
+        # stdin is a single input anyway
+        workers = default_workers([path for path in inputs if path != STDIO])
+    if args.output_dir:
+        try:
+            Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            parser.error(f"cannot create --output-dir: {e}")
+
+    start = time.perf_counter()
+    try:
+        counts = map_inputs(
+            score_file,
+            [(path, output, args.format, args.output_format, args.chunk_size)
+             for path, output in zip(inputs, outputs)],
+            workers,
+        )
+    except (OSError, ValueError) as e:
+        sys.exit(f"Error scoring records: {e}")
+    seconds = time.perf_counter() - start
+
+    for output, rows in zip(outputs, counts):
+        if output != STDIO:
+            print(f"Generated {output} ({rows:,} rows)", file=sys.stderr)
+    rows = sum(counts)
+    peak = peak_memory_mb()
+    print(
+        f"Scored {rows:,} rows from {len(inputs)} input(s) with {min(workers, len(inputs))} worker(s) "
+        f"in {seconds:.2f}s ({rows / seconds if seconds > 0 else 0:,.0f} rows/sec), "
+        f"peak memory {'n/a' if peak is None else f'{peak:,.1f} MB'}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
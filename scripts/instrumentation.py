@@ -0,0 +1,157 @@
+"""
+Lightweight instrumentation for the pipeline, loaders and app reruns.
+
+Stages record wall time, row counts and bytes read/written as structured
+events. Events are kept in memory for the app's diagnostics panel and
+written as JSON lines to the "algoeconomics.diagnostics" logger; set
+ALGOECON_DIAGNOSTICS_LOG to a file path to persist them.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+logger = logging.getLogger("algoeconomics.diagnostics")
+
+MAX_EVENTS = 500
+
+_events = deque(maxlen=MAX_EVENTS)
+_cache_counts = Counter()
+_lock = threading.Lock()
+
+
+def _configure_logger():
+    log_path = os.environ.get("ALGOECON_DIAGNOSTICS_LOG")
+    if log_path and not logger.handlers:
+        handler = logging.FileHandler(log_path)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+
+_configure_logger()
+
+
+def emit(event):
+    """Record a structured event and log it as one JSON line."""
+    event = {"time": datetime.now(timezone.utc).isoformat(), "pid": os.getpid(), **event}
+    with _lock:
+        _events.append(event)
+    logger.info(json.dumps(event, default=str))
+    return event
+
+
+@contextmanager
+def stage(name, **fields):
+    """
+    Time a stage and emit it as an event.
+
+    The yielded dict can be filled in by the caller (e.g. rows,
+    bytes_read, bytes_written); an exception marks the stage as failed.
+    """
+    record = {"stage": name, **fields}
+    start = time.perf_counter()
+    try:
+        yield record
+        record.setdefault("status", "ok")
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["seconds"] = round(time.perf_counter() - start, 6)
+        emit(record)
+
+
+def count_cache_call(loader):
+    """Count a call to a cached loader."""
+    with _lock:
+        _cache_counts[(loader, "calls")] += 1
+
+
+def count_cache_miss(loader):
+    """Count a cache miss; call from inside the cached function body."""
+    with _lock:
+        _cache_counts[(loader, "misses")] += 1
+
+
+def cache_stats():
+    """Return {loader: {"calls": n, "hits": n, "misses": n}}."""
+    with _lock:
+        counts = dict(_cache_counts)
+    stats = {}
+    for (loader, kind), n in sorted(counts.items()):
+        stats.setdefault(loader, {"calls": 0, "hits": 0, "misses": 0})[kind] = n
+    for loader_stats in stats.values():
+        loader_stats["hits"] = max(0, loader_stats["calls"] - loader_stats["misses"])
+    return stats
+
+
+def recent_events(limit=100, stage_name=None):
+    """Return the most recent events, newest first."""
+    with _lock:
+        events = list(_events)
+    if stage_name is not None:
+        events = [e for e in events if e.get("stage") == stage_name]
+    return events[::-1][:limit]
+
+
+def file_size(path):
+    """Size of path in bytes, or None if it does not exist."""
+    try:
+        return path.stat().st_size
+    except (FileNotFoundError, AttributeError):
+        return None
+
+
+class RerunMonitor:
+    """
+    Times one app rerun, or one run of a fragment, optionally under cProfile.
+
+    Create at the top of the script (or fragment body) and call finish() at
+    the bottom. cProfile cannot nest, so a monitor started while a profiler
+    is already active only times its run: a fragment running as part of a
+    profiled full rerun is covered by that rerun's profile.
+    """
+
+    def __init__(self, profile=False, fragment=None):
+        self.start = time.perf_counter()
+        self.fragment = fragment
+        self.profile = None
+        if profile and sys.getprofile() is None:
+            self.profile = cProfile.Profile()
+            try:
+                self.profile.enable()
+            except ValueError:  # Python 3.12+: another profiler is active
+                self.profile = None
+
+    def finish(self, top=30):
+        """
+        Emit an app_rerun event (with the fragment's name for fragment runs).
+
+        Returns:
+            str: top functions by cumulative time when profiling, else None
+        """
+        report = None
+        if self.profile is not None:
+            self.profile.disable()
+            out = io.StringIO()
+            pstats.Stats(self.profile, stream=out).sort_stats("cumulative").print_stats(top)
+            report = out.getvalue()
+        emit({
+            "stage": "app_rerun",
+            "fragment": self.fragment,
+            "seconds": round(time.perf_counter() - self.start, 6),
+            "profiled": self.profile is not None,
+        })
+        return report
@@ -0,0 +1,117 @@
+"""
+Cross-process single-flight coordination for pipeline runs.
+
+Several app replicas or worker processes can share one data directory and
+call run_scoring_pipeline at the same moment. An exclusive lock file in
+the data directory lets only one of them run at a time, and a run
+generation counter, bumped after every completed run, tells the callers
+that waited whether a run finished while they were blocked: those join
+its result instead of recomputing it.
+"""
+
+import time
+from contextlib import contextmanager
+
+from scripts.instrumentation import emit
+from scripts.storage import atomic_path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+LOCK_FILE = "_pipeline.lock"
+GENERATION_FILE = "_pipeline_generation"
+
+# Seconds to wait for an in-flight run before giving up
+LOCK_TIMEOUT = 600.0
+LOCK_POLL_INTERVAL = 0.1
+
+
+def _try_lock(f):
+    try:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(path, timeout=LOCK_TIMEOUT):
+    """
+    Hold an exclusive lock on path, across processes and threads.
+
+    Yields:
+        bool: True if the lock was held by someone else and had to be waited for
+
+    Raises:
+        TimeoutError: If the lock is not acquired within timeout seconds
+    """
+    with open(path, "a+") as f:
+        waited = False
+        deadline = time.monotonic() + timeout
+        while not _try_lock(f):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out after {timeout:.0f}s waiting for {path}")
+            waited = True
+            time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            yield waited
+        finally:
+            _unlock(f)
+
+
+def read_generation(data_path):
+    """Number of pipeline runs completed in data_path (0 if none recorded)."""
+    try:
+        return int((data_path / GENERATION_FILE).read_text())
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _bump_generation(data_path):
+    generation = read_generation(data_path) + 1
+    with atomic_path(data_path / GENERATION_FILE) as tmp:
+        tmp.write_text(str(generation))
+    return generation
+
+
+def single_flight(data_path, run, timeout=LOCK_TIMEOUT):
+    """
+    Call run(joined) while holding data_path's pipeline lock.
+
+    joined is True when this caller had to wait and another run completed
+    meanwhile; run should then reuse that run's outputs rather than redo
+    its work. The generation is bumped after each run that did not join.
+
+    Returns:
+        The result of run
+    """
+    generation = read_generation(data_path)
+    start = time.perf_counter()
+    with file_lock(data_path / LOCK_FILE, timeout) as waited:
+        joined = waited and read_generation(data_path) != generation
+        emit({
+            "stage": "pipeline_lock",
+            "seconds": round(time.perf_counter() - start, 6),
+            "waited": waited,
+            "joined": joined,
+            "generation": generation,
+        })
+        result = run(joined)
+        if not joined:
+            _bump_generation(data_path)
+    return result
@@ -0,0 +1,65 @@
+"""
+Pipeline manifest: fingerprints of the inputs and scoring config of the last run.
+
+The manifest lets run_scoring_pipeline skip work when nothing changed and
+recompute only the inputs that did.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from scripts.storage import atomic_path
+
+
+MANIFEST_FILE = "_pipeline_manifest.json"
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path, previous=None):
+    """
+    Fingerprint a file by content hash.
+
+    The hash is reused from the previous fingerprint when mtime and size are
+    unchanged, so unchanged files are checked without being read.
+
+    Returns:
+        dict: mtime_ns, size and sha256, or None if the file does not exist
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    if previous and previous.get("mtime_ns") == stat.st_mtime_ns and previous.get("size") == stat.st_size:
+        return dict(previous)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": file_sha256(path)}
+
+
+def load_manifest(data_path):
+    """Load the manifest from data_path, or return an empty one."""
+    try:
+        with open(data_path / MANIFEST_FILE) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(data_path, manifest):
+    """Write the manifest to data_path, stamping the refresh time."""
+    manifest = dict(manifest, refreshed_at=datetime.now(timezone.utc).isoformat())
+    with atomic_path(data_path / MANIFEST_FILE) as tmp, open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def same_content(previous, current):
+    """True when two fingerprints describe the same file contents."""
+    return bool(previous) and bool(current) and previous.get("sha256") == current.get("sha256")
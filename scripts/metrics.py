@@ -1,5 +1,7 @@
 import pandas as pd
 
+from scripts.country_index import ALL_COUNTRIES
+
 
 def calculate_total_passengers(df):
     """Calculate total passenger volume."""
@@ -15,3 +17,83 @@ def calculate_total_cargo(df):
     return int(df['cargo_tonnage'].sum())
 
 
+class FlowRollup:
+    """
+    Pre-aggregated totals of a route flow measure.
+
+    The raw table is summed once by country × year (× route, when the table
+    has a route column); queries are answered from these sums, which are a
+    small fraction of the raw rows.
+
+    Args:
+        df: Flow rows with country, year and value_column
+        value_column: Measure to total, e.g. passenger_volume
+    """
+
+    def __init__(self, df, value_column):
+        self.value_column = value_column
+        keys = [col for col in ("country", "year", "route") if col in df.columns]
+        if df.empty or value_column not in df.columns or "country" not in keys or "year" not in keys:
+            self.table = pd.DataFrame(columns=["country", "year", value_column])
+        else:
+            self.table = (
+                df.groupby(keys, observed=True)[value_column]
+                .sum()
+                .reset_index()
+            )
+            self.table["country"] = self.table["country"].astype(str)
+        self._by_country_year = self.table.groupby(["country", "year"])[value_column].sum()
+        self._by_year = self._by_country_year.groupby(level="year").sum()
+
+    @property
+    def empty(self):
+        return self.table.empty
+
+    def has_country(self, country=ALL_COUNTRIES):
+        """Whether there are flows for country ("All" for any country)."""
+        if country == ALL_COUNTRIES:
+            return not self.empty
+        return country in self._by_country_year.index.get_level_values("country")
+
+    def series(self, country=ALL_COUNTRIES):
+        """Yearly totals for country ("All" for every country), indexed by year."""
+        if country == ALL_COUNTRIES:
+            return self._by_year
+        if not self.has_country(country):
+            return self._by_year.iloc[0:0]
+        return self._by_country_year.xs(country, level="country")
+
+    def total(self, country=ALL_COUNTRIES, year=None):
+        """Total for country ("All" for every country), optionally for one year."""
+        series = self.series(country)
+        if year is not None:
+            return series.get(year, 0)
+        return series.sum()
+
+    def by_country(self, year=None):
+        """
+        Totals per country.
+
+        Returns:
+            pd.DataFrame: country, value_column
+        """
+        totals = self._by_country_year
+        if year is not None:
+            totals = totals[totals.index.get_level_values("year") == year]
+        return totals.groupby(level="country").sum().reset_index()
+
+    def yoy_deltas(self, country=ALL_COUNTRIES):
+        """
+        Year-over-year changes of the yearly totals.
+
+        Returns:
+            pd.DataFrame: year, value_column, delta, pct_change (NaN for the
+                first year)
+        """
+        series = self.series(country).sort_index()
+        return pd.DataFrame({
+            "year": series.index,
+            self.value_column: series.to_numpy(),
+            "delta": series.diff().to_numpy(),
+            "pct_change": (series.pct_change() * 100).to_numpy(),
+        })
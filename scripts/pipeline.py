@@ -5,137 +5,646 @@ This module loads governance flags CSVs, computes AI procurement indices,
 and writes computed output CSVs.
 """
 
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from scripts.scoring import calculate_ai_procurement_index
+from scripts.instrumentation import stage
+from scripts.locking import single_flight
+from scripts.manifest import file_fingerprint, load_manifest, same_content, save_manifest
+from scripts.sqlite_store import SQLITE_ENABLED, stale_sources, table_version, write_partition
+from scripts.storage import atomic_path, iter_chunks, read_table, remove_columnar_snapshot, write_table
+from scripts.scoring import FLAG_WEIGHTS, config_version, governance_score_batch, score_frame
+from scripts.views import (
+    INBOUND_COLUMNS,
+    SCORE_COLUMNS,
+    TOURISM_INBOUND_FILE,
+    TOURISM_VIEW_FILE,
+    build_tourism_view,
+    inbound_as_of,
+    sector_scores,
+)
+
+
+# Processed data directory; ALGOECON_DATA_PATH points the pipeline and app elsewhere
+DATA_PATH = Path(os.environ.get("ALGOECON_DATA_PATH", Path(__file__).parent.parent / "data" / "processed"))
+
+# Governance flags inputs read by the pipeline, one per sector. Set to an
+# explicit list of file names to disable discovery.
+INPUT_FILES = None
+INPUT_PATTERN = "fact_*_governance_flags.csv"
+
+# Below this total input size, scoring in worker processes costs more than it saves
+PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+
+# Opportunity scores output
+OPPORTUNITY_FILE = "fact_uk_africa_aviation_opportunity.csv"
+
+# Per-country HIGH/LOW governance flags output
+GOVERNANCE_FILE = "fact_governance_flags.csv"
+
+REQUIRED_COLUMNS = ['country', 'sector', 'digital_procurement', 'open_contracting',
+                    'ai_policy', 'vendor_transparency', 'country_modifier']
+
+# Countries whose average governance score reaches this value are flagged HIGH
+GOVERNANCE_THRESHOLD = 0.5
 
+# Inputs and outputs are partitioned by year: each year's governance flags
+# live in DATA_PATH/years/<year>/, except BASE_YEAR's, which live directly
+# in DATA_PATH. Every partition has its own outputs and manifest.
+BASE_YEAR = 2023
+PARTITIONS_DIR = "years"
 
-def flags_from_row(row):
-    """Extract governance flags from a DataFrame row."""
-    return {
-        "digital_procurement": bool(row["digital_procurement"]),
-        "open_contracting": bool(row["open_contracting"]),
-        "ai_policy": bool(row["ai_policy"]),
-        "vendor_transparency": bool(row["vendor_transparency"]),
-    }
 
+# Callbacks run after the pipeline writes new outputs (e.g. cache invalidation)
+_output_hooks = []
 
-def run_scoring_pipeline():
+
+def register_output_hook(hook):
+    """Register a no-argument callback to run after each run that writes outputs."""
+    if hook not in _output_hooks:
+        _output_hooks.append(hook)
+
+
+def _run_output_hooks():
+    for hook in _output_hooks:
+        try:
+            hook()
+        except Exception as e:
+            print(f"Error in pipeline output hook: {str(e)}")
+
+
+def input_files(data_path=DATA_PATH):
     """
-    Run the complete scoring pipeline.
+    Governance flags input files, in a deterministic (sorted) order.
+
+    Uses INPUT_FILES when set, otherwise every file matching INPUT_PATTERN.
+    """
+    if INPUT_FILES is not None:
+        return list(INPUT_FILES)
+    return sorted(path.name for path in data_path.glob(INPUT_PATTERN))
+
+
+def partition_path(data_path=DATA_PATH, year=BASE_YEAR):
+    """Directory holding one year's inputs and outputs."""
+    if year == BASE_YEAR:
+        return data_path
+    return data_path / PARTITIONS_DIR / str(year)
+
+
+def partition_years(data_path=DATA_PATH):
+    """Years that have governance flags inputs, oldest first."""
+    years = set()
+    if input_files(data_path):
+        years.add(BASE_YEAR)
+    partitions_dir = data_path / PARTITIONS_DIR
+    if partitions_dir.is_dir():
+        for path in partitions_dir.iterdir():
+            if path.is_dir() and path.name.isdigit() and input_files(path):
+                years.add(int(path.name))
+    return sorted(years)
+
+
+def map_inputs(fn, args_list, workers):
+    """
+    Call fn(*args) for each args in args_list, in worker processes when workers > 1.
+
+    fn must be a module-level function so spawned workers can import it.
+    Results come back in input order, so merging them stays deterministic.
+    The first exception raised by a call propagates once every worker has
+    finished.
+
+    Returns:
+        list: fn's result for each args, in args_list order
+    """
+    if workers <= 1 or len(args_list) <= 1:
+        return [fn(*args) for args in args_list]
+    # spawn: the pipeline may run in a background thread of the app, where fork is unsafe
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        return list(pool.map(fn, *zip(*args_list)))
+
+
+def default_workers(paths):
+    """
+    Worker processes for scoring paths with map_inputs.
+
+    One per input up to the CPU count, or 1 when the inputs total less than
+    PARALLEL_MIN_BYTES (missing paths count as empty).
+    """
+    total_bytes = sum(os.path.getsize(path) for path in paths if os.path.isfile(path))
+    if total_bytes < PARALLEL_MIN_BYTES:
+        return 1
+    return min(len(paths), os.cpu_count() or 1)
+
+
+def computed_file_name(input_file):
+    """Name of the scored output written for a governance flags input."""
+    return input_file.replace(".csv", "_computed.csv")
+
+
+def compute_governance_flags(combined_df, threshold=GOVERNANCE_THRESHOLD, year=BASE_YEAR):
+    """
+    Compute HIGH/LOW governance flags per country.
+
+    Scores every row's governance flags in one vectorized pass, then averages
+    them per country with a single grouped aggregation.
+
+    Args:
+        combined_df: Governance flags rows for all sectors
+        threshold: Average governance score at or above which a country is HIGH
+        year: Year stamped on every output row
+
+    Returns:
+        pd.DataFrame: country, year, governance_flag
+    """
+    scores = governance_score_batch({k: combined_df[k] for k in FLAG_WEIGHTS})
+    avg_governance = (
+        pd.Series(scores, index=combined_df.index)
+        .groupby(combined_df['country'], sort=False, observed=True)
+        .mean()
+    )
+    return governance_flags_from_averages(avg_governance, threshold, year)
+
+
+def governance_flags_from_averages(avg_governance, threshold=GOVERNANCE_THRESHOLD, year=BASE_YEAR):
+    """Turn a Series of average governance scores indexed by country into HIGH/LOW flags."""
+    return pd.DataFrame({
+        'country': avg_governance.index,
+        'year': year,
+        'governance_flag': np.where(avg_governance.to_numpy() >= threshold, 'HIGH', 'LOW')
+    })
+
+
+class GovernanceAccumulator:
+    """
+    Running per-country governance score sums and counts.
+
+    Lets governance flags be computed from chunks of rows without keeping
+    the rows; memory grows with the number of countries only.
+    """
+
+    def __init__(self):
+        self._totals = {}
+
+    def update(self, df):
+        """Add a chunk of governance flags rows."""
+        scores = pd.Series(governance_score_batch({k: df[k] for k in FLAG_WEIGHTS}), index=df.index)
+        grouped = scores.groupby(df['country'], sort=False, observed=True).agg(['sum', 'count'])
+        for country, total, count in zip(grouped.index, grouped['sum'], grouped['count']):
+            running = self._totals.setdefault(country, [0.0, 0])
+            running[0] += total
+            running[1] += count
+
+    def merge(self, other):
+        """Add another accumulator's totals (e.g. from a worker process)."""
+        for country, (total, count) in other._totals.items():
+            running = self._totals.setdefault(country, [0.0, 0])
+            running[0] += total
+            running[1] += count
+
+    def averages(self):
+        """Average governance score per country, in first-seen order."""
+        return pd.Series(
+            {country: total / count for country, (total, count) in self._totals.items()},
+            dtype=float,
+        ).rename_axis('country')
+
+
+def opportunity_rows(df, year=BASE_YEAR):
+    """
+    Opportunity scores for scored governance flags rows.
+
+    Uses ai_procurement_index as procurement_readiness_score (multiplied by
+    100 for a percentage-like score).
+    """
+    return pd.DataFrame({
+        'country': df['country'],
+        'year': year,
+        'sector': df['sector'],
+        'procurement_readiness_score': (df['ai_procurement_index'] * 100).round(1)
+    })
+
+
+def check_input_year(df, name, year):
+    """
+    Reject governance flags rows stamped with a year other than their partition's.
+
+    Outputs are stamped with the partition year, so an input's own year
+    column (e.g. a multi-year export) must agree with it.
+
+    Raises:
+        ValueError: If any row's year differs from year
+    """
+    if 'year' not in df.columns:
+        return
+    years = pd.to_numeric(df['year'], errors='coerce')
+    other = sorted(set(years[years.notna() & (years != year)].astype(int)))
+    if other:
+        raise ValueError(
+            f"{name} has rows for {other} in the {year} partition; "
+            f"move them to {PARTITIONS_DIR}/<year>/ (inputs of {BASE_YEAR} live in the data directory)"
+        )
+
+
+def _score_input(data_path, year, name):
+    """
+    Score one governance flags input in full and write its computed output.
+
+    Runs in a worker process when inputs are scored in parallel. Rescoring
+    a whole file is cheaper than matching its rows against the previous
+    output, so only the previous output's countries are read.
+
+    Returns:
+        tuple: (scored df, set of countries in the input's new or previous
+            version, whose governance flags may have changed)
+    """
+    computed_path = data_path / computed_file_name(name)
+    df = read_table(data_path / name)
+    if not all(col in df.columns for col in REQUIRED_COLUMNS):
+        raise ValueError(f"{name} missing required columns")
+    check_input_year(df, name, year)
     
-    Loads governance flags CSVs, computes AI procurement indices,
-    and writes computed output CSVs.
+    affected_countries = set(df['country'].unique())
+    if computed_path.exists():
+        affected_countries |= set(read_table(computed_path, columns=['country'])['country'].unique())
     
+    # Write computed flags (with ai_procurement_index)
+    df["ai_procurement_index"] = score_frame(df)
+    write_table(df, computed_path)
+    return df, affected_countries
+
+
+def _part_path(data_path, name):
+    return data_path / f".{name}.opportunity.part"
+
+
+def _stream_input(data_path, year, name, chunk_size):
+    """
+    Stream one input in chunks, writing its computed output and an opportunity part file.
+
+    Returns:
+        tuple: (opportunity part path, GovernanceAccumulator)
+    """
+    accumulator = GovernanceAccumulator()
+    computed_path = data_path / computed_file_name(name)
+    part_path = _part_path(data_path, name)
+    with atomic_path(computed_path) as computed_tmp, \
+            open(computed_tmp, "w", newline="") as computed_file, \
+            open(part_path, "w", newline="") as part_file:
+        for i, chunk in enumerate(pd.read_csv(data_path / name, chunksize=chunk_size)):
+            if i == 0 and not all(col in chunk.columns for col in REQUIRED_COLUMNS):
+                raise ValueError(f"{name} missing required columns")
+            check_input_year(chunk, name, year)
+            chunk["ai_procurement_index"] = score_frame(chunk)
+            chunk.to_csv(computed_file, header=i == 0, index=False)
+            opportunity_rows(chunk, year).to_csv(part_file, header=i == 0, index=False)
+            accumulator.update(chunk)
+    remove_columnar_snapshot(computed_path)
+    return part_path, accumulator
+
+
+def _stream_outputs(data_path, year, names, governance_threshold, chunk_size, workers):
+    """
+    Score every input in chunks of chunk_size rows, appending to the outputs.
+
+    Peak memory per worker is bounded by the chunk size (plus per-country
+    running totals), independent of input size.
+
     Returns:
-        tuple: (governance_df, opportunity_df) or (None, None) on error
+        pd.DataFrame: governance flags per country
     """
+    accumulator = GovernanceAccumulator()
+    opportunity_path = data_path / OPPORTUNITY_FILE
     try:
-        # Define paths
-        base_path = Path(__file__).parent.parent
-        data_path = base_path / "data" / "processed"
-        
-        # Load governance flags CSVs
-        aviation_flags_path = data_path / "fact_aviation_governance_flags.csv"
-        tourism_flags_path = data_path / "fact_tourism_governance_flags.csv"
-        
-        if not aviation_flags_path.exists():
-            raise FileNotFoundError(f"Aviation governance flags CSV not found: {aviation_flags_path}")
-        if not tourism_flags_path.exists():
-            raise FileNotFoundError(f"Tourism governance flags CSV not found: {tourism_flags_path}")
-        
-        aviation_df = pd.read_csv(aviation_flags_path)
-        tourism_df = pd.read_csv(tourism_flags_path)
-        
-        # Validate required columns
-        required_cols = ['country', 'sector', 'digital_procurement', 'open_contracting', 
-                        'ai_policy', 'vendor_transparency', 'country_modifier']
-        if not all(col in aviation_df.columns for col in required_cols):
-            raise ValueError("Aviation governance flags CSV missing required columns")
-        if not all(col in tourism_df.columns for col in required_cols):
-            raise ValueError("Tourism governance flags CSV missing required columns")
-        
-        # Compute AI procurement indices for both sectors
-        all_dfs = []
+        results = map_inputs(_stream_input, [(data_path, year, name, chunk_size) for name in names], workers)
+        
+        # Concatenate the per-input opportunity parts and merge running totals in input order
+        with atomic_path(opportunity_path) as opportunity_tmp, \
+                open(opportunity_tmp, "w", newline="") as opportunity_file:
+            header_written = False
+            for part_path, part_accumulator in results:
+                with open(part_path, newline="") as part_file:
+                    header = part_file.readline()
+                    if not header_written:
+                        opportunity_file.write(header)
+                        header_written = True
+                    shutil.copyfileobj(part_file, opportunity_file)
+                accumulator.merge(part_accumulator)
+    finally:
+        # Every input's part, including those of other workers when one failed
+        for name in names:
+            try:
+                _part_path(data_path, name).unlink()
+            except FileNotFoundError:
+                pass
+    remove_columnar_snapshot(opportunity_path)
+
+    governance_df = governance_flags_from_averages(accumulator.averages(), governance_threshold, year)
+    write_table(governance_df, data_path / GOVERNANCE_FILE)
+    return governance_df
+
+
+def _source_versions(fingerprints):
+    # A source's stored rows go stale when its contents or the scoring config change
+    return {name: f"{fingerprint['sha256']}:{config_version()}" for name, fingerprint in fingerprints.items()}
+
+
+def _sync_store(store_path, data_path, year, fingerprints, scored=None, governance_df=None, chunk_size=100_000):
+    """
+    Sync a partition into the SQLite store.
+
+    Only inputs whose stored version is stale are synced; their scored rows
+    are taken from scored when given, otherwise read from disk in chunks.
+    """
+    versions = _source_versions(fingerprints)
+    stale = stale_sources(store_path, year, versions)
+
+    def chunks(name):
+        if scored is not None and name in scored:
+            return scored[name]
+        return pd.read_csv(data_path / computed_file_name(name), chunksize=chunk_size)
+
+    if governance_df is None:
+        governance_df = read_table(data_path / GOVERNANCE_FILE)
+    write_partition(
+        store_path, year,
+        {name: chunks(name) for name in stale},
+        governance_df,
+        {name: (opportunity_rows(chunk, year) for chunk in iter_chunks(chunks(name))) for name in stale},
+        versions,
+    )
+
+
+def _refresh_tourism_view(root_path, data_path, year, previous_entry, scores_changed, opportunity=None,
+                          governance_df=None, chunk_size=None):
+    """
+    Rebuild a partition's tourism view if its scores or the inbound volumes changed.
+
+    The side of the join that did not change is reused from the existing
+    view instead of being recomputed; the view is removed when there are
+    no inbound volumes.
+
+    Returns:
+        tuple: (manifest entry or None, whether the view was rewritten)
+    """
+    inbound_path = root_path / TOURISM_INBOUND_FILE
+    view_path = data_path / TOURISM_VIEW_FILE
+    fingerprint = file_fingerprint(inbound_path, (previous_entry or {}).get("inbound"))
+    if fingerprint is None:
+        if view_path.exists():
+            view_path.unlink()
+            remove_columnar_snapshot(view_path)
+            return None, True
+        return None, False
+    entry = {"inbound": fingerprint}
+    inbound_changed = not same_content((previous_entry or {}).get("inbound"), fingerprint)
+    if view_path.exists() and not (inbound_changed or scores_changed):
+        return entry, False
+    previous = read_table(view_path) if view_path.exists() else None
+    
+    with stage("tourism_view", year=year, inbound_changed=inbound_changed, scores_changed=scores_changed) as record:
+        if previous is not None and not scores_changed:
+            scores = previous[SCORE_COLUMNS]
+        else:
+            if governance_df is None:
+                governance_df = read_table(data_path / GOVERNANCE_FILE)
+            if opportunity is None:
+                opportunity = (
+                    pd.read_csv(data_path / OPPORTUNITY_FILE, chunksize=chunk_size) if chunk_size
+                    else read_table(data_path / OPPORTUNITY_FILE)
+                )
+            scores = sector_scores(opportunity, governance_df)
+        
+        previous_countries = set() if previous is None else set(previous["country"].astype(str))
+        if previous is not None and not inbound_changed and set(scores["country"].astype(str)) <= previous_countries:
+            inbound = previous[INBOUND_COLUMNS]
+        else:
+            inbound = inbound_as_of(
+                pd.read_csv(inbound_path, chunksize=chunk_size) if chunk_size else read_table(inbound_path), year
+            )
+        view = build_tourism_view(inbound, scores, year)
+        write_table(view, view_path)
+        record["rows"] = len(view)
+    return entry, True
+
+
+def _run_partition(data_path, year, governance_threshold, force, chunk_size, workers, read_outputs=True,
+                   store_path=None):
+    """
+    Run the pipeline for one year partition (see run_scoring_pipeline).
+
+    store_path is the root data directory: it holds the SQLite store and
+    the tourism inbound volumes joined into the partition's tourism view.
+
+    Returns:
+        tuple: (governance_df, opportunity_df); (None, None) when nothing
+            changed and read_outputs is False
+    """
+    use_store = SQLITE_ENABLED and store_path is not None
+    with stage("pipeline", year=year, streaming=bool(chunk_size)) as run:
+        # Fingerprint inputs and compare with the last run
+        previous = {} if force else load_manifest(data_path)
+        previous_inputs = previous.get("inputs", {})
+        names = input_files(data_path)
+        if not names:
+            raise FileNotFoundError(f"No governance flags CSVs found in {data_path}")
+        # A removed input changes every average it contributed to
+        inputs_removed = bool(set(previous_inputs) - set(names))
+        scoring_changed = previous.get("config_version") != config_version()
+        threshold_changed = previous.get("governance_threshold") != governance_threshold
+        
+        fingerprints = {}
+        for name in names:
+            fingerprint = file_fingerprint(data_path / name, previous_inputs.get(name))
+            if fingerprint is None:
+                raise FileNotFoundError(f"Governance flags CSV not found: {data_path / name}")
+            fingerprints[name] = fingerprint
+        
+        outputs = [computed_file_name(name) for name in names] + [OPPORTUNITY_FILE, GOVERNANCE_FILE]
+        outputs_exist = all((data_path / name).exists() for name in outputs)
+        unchanged = [
+            name for name in names
+            if outputs_exist and not scoring_changed and same_content(previous_inputs.get(name), fingerprints[name])
+        ]
+        manifest = {
+            "config_version": config_version(),
+            "governance_threshold": governance_threshold,
+            "year": year,
+            "inputs": fingerprints,
+        }
+        
+        if len(unchanged) == len(names) and not (threshold_changed or inputs_removed):
+            # Scores are unchanged, but the inbound volumes may not be
+            view_refreshed = False
+            if store_path is not None:
+                manifest["tourism_view"], view_refreshed = _refresh_tourism_view(
+                    store_path, data_path, year, previous.get("tourism_view"), False, chunk_size=chunk_size
+                )
+            # Only record new mtimes if files were touched
+            if fingerprints != previous_inputs or manifest.get("tourism_view") != previous.get("tourism_view"):
+                save_manifest(data_path, manifest)
+            if view_refreshed:
+                _run_output_hooks()
+            run["status"] = "noop"
+            if use_store and (
+                table_version(store_path, "governance_flags", year) is None
+                or stale_sources(store_path, year, _source_versions(fingerprints))
+            ):
+                # Store enabled (or rebuilt) after these outputs were written
+                _sync_store(store_path, data_path, year, fingerprints)
+            if not read_outputs:
+                return None, None
+            if chunk_size:
+                return read_table(data_path / GOVERNANCE_FILE), None
+            return read_table(data_path / GOVERNANCE_FILE), read_table(data_path / OPPORTUNITY_FILE)
+        
+        changed_names = [name for name in names if name not in unchanged]
+        if workers is None:
+            workers = default_workers([data_path / name for name in changed_names])
         
-        for df in [aviation_df, tourism_df]:
-            scores = []
-            for _, row in df.iterrows():
-                flags = flags_from_row(row)
-                score = calculate_ai_procurement_index(
-                    row["sector"],
-                    flags,
-                    float(row.get("country_modifier", 1.0))
+        if chunk_size:
+            governance_df = _stream_outputs(data_path, year, names, governance_threshold, chunk_size, workers)
+            if use_store:
+                _sync_store(store_path, data_path, year, fingerprints, governance_df=governance_df, chunk_size=chunk_size)
+            if store_path is not None:
+                manifest["tourism_view"], _ = _refresh_tourism_view(
+                    store_path, data_path, year, previous.get("tourism_view"), True,
+                    governance_df=governance_df, chunk_size=chunk_size,
                 )
-                scores.append(score)
-            df["ai_procurement_index"] = scores
+            save_manifest(data_path, manifest)
+            _run_output_hooks()
+            return governance_df, None
+        
+        # Compute AI procurement indices for changed inputs only
+        with stage("scoring", inputs=len(changed_names), workers=workers) as scoring:
+            scored = dict(zip(changed_names, map_inputs(
+                _score_input,
+                [(data_path, year, name) for name in changed_names],
+                workers,
+            )))
+            scoring["rows"] = sum(len(df) for df, _ in scored.values())
+        all_dfs = []
+        affected_countries = set()
+        for name in names:
+            if name in scored:
+                df, affected = scored[name]
+                affected_countries |= affected
+            else:
+                df = read_table(data_path / computed_file_name(name))
             all_dfs.append(df)
         
         # Combine into single opportunity dataframe
         combined_df = pd.concat(all_dfs, ignore_index=True)
         
         # Create opportunity_df with expected schema: country, year, sector, procurement_readiness_score
-        # Use ai_procurement_index as procurement_readiness_score (multiply by 100 for percentage-like score)
-        # Default year to 2023 (can be extracted from other data sources if available)
-        opportunity_df = pd.DataFrame({
-            'country': combined_df['country'],
-            'year': 2023,  # Default year
-            'sector': combined_df['sector'],
-            'procurement_readiness_score': (combined_df['ai_procurement_index'] * 100).round(1)
-        })
+        opportunity_df = opportunity_rows(combined_df, year)
         
         # Create governance_df with governance flags computed from governance scores
-        # Compute governance score for each country (average across sectors)
-        governance_scores = []
-        countries = []
-        for country in combined_df['country'].unique():
-            country_data = combined_df[combined_df['country'] == country]
-            # Calculate average governance score (sum of flag weights)
-            avg_governance = 0
-            count = 0
-            for _, row in country_data.iterrows():
-                flags = flags_from_row(row)
-                from scripts.scoring import governance_score
-                avg_governance += governance_score(flags)
-                count += 1
-            if count > 0:
-                avg_governance = avg_governance / count
-            # HIGH if governance score >= 0.5, LOW otherwise
-            flag = 'HIGH' if avg_governance >= 0.5 else 'LOW'
-            governance_scores.append(flag)
-            countries.append(country)
-        
-        governance_df = pd.DataFrame({
-            'country': countries,
-            'year': 2023,
-            'governance_flag': governance_scores
-        })
-        
-        # Write computed aviation flags (with ai_procurement_index)
-        aviation_output_path = data_path / "fact_aviation_governance_flags_computed.csv"
-        aviation_df.to_csv(aviation_output_path, index=False)
-        
-        # Write computed tourism flags (with ai_procurement_index)
-        tourism_output_path = data_path / "fact_tourism_governance_flags_computed.csv"
-        tourism_df.to_csv(tourism_output_path, index=False)
-        
-        # Write opportunity scores
-        opportunity_output_path = data_path / "fact_uk_africa_aviation_opportunity.csv"
-        opportunity_df.to_csv(opportunity_output_path, index=False)
-        
-        # Write governance flags (overwrite the computed file with proper structure)
-        governance_output_path = data_path / "fact_aviation_governance_flags_computed.csv"
-        # But we need to preserve the structure expected by data_loader
-        # Actually, data_loader expects a different file - let's check what it loads
-        # It loads fact_aviation_governance_flags_computed.csv but expects country, year, governance_flag
-        # So we need a separate file or update the loader
-        # For now, write to a separate governance flags file
-        governance_flags_path = data_path / "fact_governance_flags.csv"
-        governance_df.to_csv(governance_flags_path, index=False)
+        # (average across sectors per country), recomputing only affected countries
+        governance_path = data_path / GOVERNANCE_FILE
+        with stage("governance_aggregation", rows=len(combined_df)) as aggregation:
+            if scoring_changed or threshold_changed or inputs_removed or not governance_path.exists():
+                governance_df = compute_governance_flags(combined_df, governance_threshold, year)
+            else:
+                previous_governance = read_table(governance_path)
+                recomputed = compute_governance_flags(
+                    combined_df[combined_df['country'].isin(affected_countries)], governance_threshold, year
+                )
+                kept = previous_governance[~previous_governance['country'].isin(affected_countries)]
+                governance_df = (
+                    pd.concat([kept, recomputed], ignore_index=True)
+                    .set_index('country')
+                    .reindex(pd.unique(combined_df['country']))
+                    .reset_index()
+                )
+            aggregation["countries"] = len(governance_df)
+        
+        run["rows"] = len(combined_df)
+        
+        # Write opportunity scores and governance flags
+        write_table(opportunity_df, data_path / OPPORTUNITY_FILE)
+        write_table(governance_df, governance_path)
+        if use_store:
+            _sync_store(store_path, data_path, year, fingerprints, dict(zip(names, all_dfs)), governance_df)
+        if store_path is not None:
+            manifest["tourism_view"], _ = _refresh_tourism_view(
+                store_path, data_path, year, previous.get("tourism_view"), True, opportunity_df, governance_df
+            )
+        save_manifest(data_path, manifest)
+        _run_output_hooks()
         
         return governance_df, opportunity_df
+
+
+def run_scoring_pipeline(governance_threshold=GOVERNANCE_THRESHOLD, force=False, chunk_size=None, workers=None,
+                         data_path=None, year=None):
+    """
+    Run the complete scoring pipeline.
+    
+    Loads governance flags CSVs (one per sector, see input_files), computes
+    AI procurement indices and writes computed output CSVs. Changed inputs
+    are scored in parallel worker processes when they are large enough.
+    
+    Runs are incremental: a manifest records content hashes of the inputs and
+    the scoring config version. When nothing changed the run writes nothing;
+    otherwise only changed input files are rescored and only the governance
+    flags of countries in them recomputed.
+    
+    Each year partition (see partition_years) is run on its own, so adding
+    a year only computes and writes that year's partition; earlier years
+    are left untouched.
+    
+    Each partition's tourism view (see views.build_tourism_view) is
+    refreshed whenever its scores or the tourism inbound volumes change.
+    
+    With chunk_size set, inputs are instead streamed in chunks and fully
+    rescored with bounded memory; opportunity scores are then only written,
+    not returned.
+    
+    Runs are single-flight across processes sharing data_path (see
+    locking.single_flight): a caller that arrives during another run waits
+    for it and, once it completes, only checks the manifest instead of
+    recomputing (even with force). Every output is written to a temporary
+    file and renamed into place, so readers never see partial files.
+    
+    Args:
+        governance_threshold: Average governance score at or above which a
+            country is flagged HIGH
+        force: Ignore the manifest and recompute everything
+        chunk_size: Rows per chunk for streaming mode (default: in-memory)
+        workers: Worker processes for scoring inputs (default: one per input,
+            up to the CPU count, or 1 for inputs under PARALLEL_MIN_BYTES)
+        data_path: Directory of inputs and outputs (default: DATA_PATH)
+        year: Run only this year's partition (default: every year)
+    
+    Returns:
+        tuple: (governance_df, opportunity_df) of the year run, or of the
+            latest year when running every year; (None, None) on error;
+            opportunity_df is None in streaming mode
+    """
+    try:
+        data_path = Path(data_path or DATA_PATH)
+        years = [year] if year is not None else partition_years(data_path) or [BASE_YEAR]
+        
+        def run(joined):
+            result = None, None
+            for partition_year in years:
+                # Unchanged earlier years are only fingerprinted, never read;
+                # after joining another run they are normally all unchanged
+                result = _run_partition(
+                    partition_path(data_path, partition_year), partition_year,
+                    governance_threshold, force and not joined, chunk_size, workers,
+                    read_outputs=partition_year == years[-1],
+                    store_path=data_path,
+                )
+            return result
+        
+        return single_flight(data_path, run)
         
     except Exception as e:
         print(f"Error in scoring pipeline: {str(e)}")
         return None, None
-
@@ -0,0 +1,144 @@
+"""
+Background refresh of the scoring pipeline.
+
+Page reruns should never run the pipeline themselves. Instead a single
+PipelineRefresher per process watches the pipeline inputs and reruns
+run_scoring_pipeline() in a daemon thread only for the year partitions
+whose inputs changed.
+"""
+
+import threading
+from datetime import datetime, timezone
+
+from scripts.manifest import load_manifest
+from scripts.pipeline import (
+    DATA_PATH,
+    OPPORTUNITY_FILE,
+    input_files,
+    partition_path,
+    partition_years,
+    run_scoring_pipeline,
+)
+from scripts.views import TOURISM_INBOUND_FILE
+
+
+def partition_inputs(year):
+    """Paths of one year partition's inputs: its governance flags plus the shared tourism inbound volumes."""
+    path = partition_path(DATA_PATH, year)
+    return [path / name for name in input_files(path)] + [DATA_PATH / TOURISM_INBOUND_FILE]
+
+
+def inputs_signature(paths=None):
+    """Return a cheap (name, mtime, size) signature of the pipeline inputs."""
+    if paths is None:
+        paths = [path for year in partition_years() for path in partition_inputs(year)]
+    signature = []
+    for path in paths:
+        try:
+            stat = path.stat()
+            signature.append((path.name, stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append((path.name, None, None))
+    return tuple(signature)
+
+
+def partition_signatures():
+    """{year: inputs_signature} for every year partition."""
+    return {year: inputs_signature(partition_inputs(year)) for year in partition_years()}
+
+
+def last_refreshed(year=None):
+    """
+    Return when the pipeline last refreshed its outputs (UTC), or None.
+
+    Args:
+        year: One year partition (default: the latest refresh of any year)
+    """
+    if year is None:
+        times = [t for t in map(last_refreshed, partition_years()) if t is not None]
+        return max(times, default=None)
+    path = partition_path(DATA_PATH, year)
+    refreshed_at = load_manifest(path).get("refreshed_at")
+    if refreshed_at:
+        return datetime.fromisoformat(refreshed_at)
+    try:
+        mtime = (path / OPPORTUNITY_FILE).stat().st_mtime
+    except FileNotFoundError:
+        return None
+    return datetime.fromtimestamp(mtime, tz=timezone.utc)
+
+
+class PipelineRefresher:
+    """
+    Rerun the scoring pipeline in a background thread when its inputs change.
+
+    Args:
+        interval: Seconds between input checks
+        on_refresh: Optional callback invoked after each successful run
+    """
+
+    def __init__(self, interval=30.0, on_refresh=None):
+        self.interval = interval
+        self.on_refresh = on_refresh
+        self._signatures = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh_if_stale(self, force=False):
+        """Run the pipeline for years whose inputs changed since their last run. Returns True if it ran."""
+        with self._lock:
+            signatures = partition_signatures()
+            stale = [year for year, signature in signatures.items()
+                     if force or self._signatures.get(year) != signature]
+            if not stale:
+                return False
+            for year in stale:
+                governance_df, _ = run_scoring_pipeline(year=year)
+                if governance_df is None:
+                    return False
+                self._signatures[year] = signatures[year]
+        if self.on_refresh is not None:
+            self.on_refresh()
+        return True
+
+    def start(self):
+        """
+        Start the background thread.
+
+        Runs the pipeline synchronously first only when no outputs exist yet,
+        so the first page load always has data to show.
+        """
+        if self._thread is not None:
+            return self
+        if last_refreshed() is None:
+            self.refresh_if_stale()
+        else:
+            # Outdated years keep no signature, so the thread refreshes them
+            outdated = self._outdated_years()
+            self._signatures = {
+                year: signature for year, signature in partition_signatures().items() if year not in outdated
+            }
+        self._thread = threading.Thread(target=self._run, name="pipeline-refresher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _outdated_years(self):
+        outdated = set()
+        for year in partition_years():
+            input_mtimes = [mtime for _, mtime, _ in inputs_signature(partition_inputs(year)) if mtime is not None]
+            refreshed = last_refreshed(year)
+            if refreshed is None or (input_mtimes and refreshed.timestamp() * 1e9 < max(input_mtimes)):
+                outdated.add(year)
+        return outdated
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh_if_stale()
+            except Exception as e:
+                print(f"Error refreshing scoring pipeline: {str(e)}")
+            self._stop.wait(self.interval)
@@ -0,0 +1,232 @@
+"""
+What-if scenarios over the scoring config.
+
+A ScenarioEngine reduces one year's governance flags rows once to per
+(country, sector, flag combination) counts and modifier sums. Each
+Scenario (flag weights, sector scores, per-country modifier overrides and
+governance threshold) is then scored from those sums with a few vectorized
+operations, entirely in memory, and memoized in a bounded LRU cache.
+"""
+
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from scripts.data_loader import CACHE_TTL, latest_year
+from scripts.instrumentation import stage
+from scripts.pipeline import (
+    DATA_PATH,
+    GOVERNANCE_THRESHOLD,
+    REQUIRED_COLUMNS,
+    input_files,
+    partition_path,
+    register_output_hook,
+)
+from scripts.refresh import inputs_signature
+from scripts.scoring import FLAG_WEIGHTS, SECTOR_SCORES, encode_flags, get_sector_score
+from scripts.storage import read_table
+
+
+# Scenario results kept per engine
+SCENARIO_CACHE_SIZE = 128
+
+
+class Scenario(NamedTuple):
+    """Hashable scoring config; build with Scenario.create()."""
+    flag_weights: Tuple[Tuple[str, float], ...]
+    sector_scores: Tuple[Tuple[str, float], ...]
+    country_modifiers: Tuple[Tuple[str, float], ...]
+    governance_threshold: float
+
+    @classmethod
+    def create(cls, flag_weights=None, sector_scores=None, country_modifiers=None,
+               governance_threshold=GOVERNANCE_THRESHOLD):
+        """
+        Scenario from overrides of the current config.
+
+        Args:
+            flag_weights: {flag: weight}; missing flags keep FLAG_WEIGHTS
+            sector_scores: {sector: score}; missing sectors keep SECTOR_SCORES
+            country_modifiers: {country: modifier} replacing those countries'
+                country_modifier on every row
+            governance_threshold: Average governance score for HIGH
+        """
+        weights = dict(FLAG_WEIGHTS, **(flag_weights or {}))
+        return cls(
+            # FLAG_WEIGHTS order, so sums match governance_score exactly
+            tuple((flag, float(weights[flag])) for flag in FLAG_WEIGHTS),
+            tuple(sorted(dict(SECTOR_SCORES, **(sector_scores or {})).items())),
+            tuple(sorted((country, float(m)) for country, m in (country_modifiers or {}).items())),
+            float(governance_threshold),
+        )
+
+
+class ScenarioResult(NamedTuple):
+    # country, sector, procurement_readiness_score
+    sectors: pd.DataFrame
+    # country, procurement_readiness_score, governance_score, governance_flag, rank
+    countries: pd.DataFrame
+
+
+class ScenarioEngine:
+    """
+    Scores scenarios over a fixed set of governance flags rows.
+
+    Rows are reduced once to per (country, sector) counts and summed country
+    modifiers for each of the 16 flag combinations. Since the index is
+    sector score x governance score x modifier, a scenario's sums are then a
+    (pairs x 16) matrix product, independent of the number of rows. Scores
+    are unrounded means, so they can differ from the pipeline's rounded
+    outputs in the last decimal.
+
+    Args:
+        df: Governance flags rows (REQUIRED_COLUMNS)
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        country_codes, self.countries = pd.factorize(df["country"], sort=True)
+        sector_codes, self.sectors = pd.factorize(df["sector"], sort=True)
+        masks = 1 << len(FLAG_WEIGHTS)
+        pair, pair_codes = pd.factorize(country_codes * len(self.sectors) + sector_codes, sort=True)
+        self._pair_country = pair_codes // len(self.sectors)
+        self._pair_sector = pair_codes % len(self.sectors)
+        cell = pair * masks + encode_flags({k: df[k] for k in FLAG_WEIGHTS})
+        size = len(pair_codes) * masks
+        self._counts = np.bincount(cell, minlength=size).reshape(-1, masks).astype(float)
+        self._modifiers = np.bincount(
+            cell, df["country_modifier"].astype(float).to_numpy(), minlength=size
+        ).reshape(-1, masks)
+        self._pair_rows = self._counts.sum(axis=1)
+        self._country_counts = np.zeros((len(self.countries), masks))
+        np.add.at(self._country_counts, self._pair_country, self._counts)
+        self._country_rows = self._country_counts.sum(axis=1)
+        # Pairs are sorted by country, so each country's pairs are contiguous
+        self._country_starts = np.searchsorted(self._pair_country, np.arange(len(self.countries)))
+        self.rows = len(df)
+        self.pairs = len(pair_codes)
+        self.run = lru_cache(maxsize=SCENARIO_CACHE_SIZE)(self._run)
+
+    def __getstate__(self):
+        # The per-instance LRU cache is not picklable (e.g. for worker processes)
+        state = dict(self.__dict__)
+        del state["run"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.run = lru_cache(maxsize=SCENARIO_CACHE_SIZE)(self._run)
+
+    def country_modifier(self, country: str) -> float:
+        """Mean country_modifier of a country's rows."""
+        pairs = self._pair_country == self.countries.get_loc(country)
+        return float(self._modifiers[pairs].sum() / self._counts[pairs].sum())
+
+    def _run(self, scenario: Scenario) -> ScenarioResult:
+        weights = [w for _, w in scenario.flag_weights]
+        # Same summation order as governance_score
+        governance = np.array([
+            sum(w for bit, w in enumerate(weights) if mask >> bit & 1) for mask in range(1 << len(weights))
+        ])
+        sector_scores = dict(scenario.sector_scores)
+        sector_score = np.array([sector_scores.get(s, get_sector_score(None)) for s in self.sectors])
+
+        # Sum of index x 100 over each (country, sector)'s rows
+        modifier_sums = self._modifiers @ governance
+        if scenario.country_modifiers:
+            overrides = dict(scenario.country_modifiers)
+            override = np.array([overrides.get(c, np.nan) for c in self.countries])[self._pair_country]
+            replaced = ~np.isnan(override)
+            modifier_sums[replaced] = override[replaced] * (self._counts[replaced] @ governance)
+        pair_sums = 100 * sector_score[self._pair_sector] * modifier_sums
+
+        sectors = pd.DataFrame({
+            "country": self.countries[self._pair_country],
+            "sector": self.sectors[self._pair_sector],
+            "procurement_readiness_score": pair_sums / self._pair_rows,
+        })
+        country_governance = (self._country_counts @ governance) / self._country_rows
+        countries = pd.DataFrame({
+            "country": self.countries,
+            "procurement_readiness_score": (
+                np.bincount(self._pair_country, pair_sums, len(self.countries)) / self._country_rows
+            ),
+            "governance_score": country_governance,
+            "governance_flag": np.where(country_governance >= scenario.governance_threshold, "HIGH", "LOW"),
+        })
+        countries["rank"] = countries["procurement_readiness_score"].rank(ascending=False, method="min").astype(int)
+        return ScenarioResult(sectors, countries)
+
+    def score_samples(self, flag_weights: np.ndarray, sector_scores: np.ndarray):
+        """
+        Score many weight and sector score samples at once.
+
+        Args:
+            flag_weights: (samples, flags) weights in FLAG_WEIGHTS order
+            sector_scores: (samples, sectors) scores in self.sectors order
+
+        Returns:
+            tuple: (scores, governance), each (countries, samples): mean
+                procurement readiness score and mean governance score
+        """
+        n_flags = flag_weights.shape[1]
+        bits = (np.arange(1 << n_flags)[:, None] >> np.arange(n_flags)) & 1
+        governance = bits @ flag_weights.T
+        pair_sums = 100 * sector_scores[:, self._pair_sector].T * (self._modifiers @ governance)
+        rows = self._country_rows[:, None]
+        scores = np.add.reduceat(pair_sums, self._country_starts, axis=0) / rows
+        return scores, (self._country_counts @ governance) / rows
+
+    def compare(self, scenario: Scenario, baseline: Optional[Scenario] = None) -> pd.DataFrame:
+        """
+        Per-country scenario results next to the baseline (default: current config).
+
+        Returns:
+            pd.DataFrame: scenario columns plus baseline_score, baseline_rank,
+                baseline_flag and rank_change (positive = moved up), by rank
+        """
+        current = self.run(scenario).countries
+        base = self.run(baseline or Scenario.create()).countries
+        compared = current.assign(
+            baseline_score=base["procurement_readiness_score"].to_numpy(),
+            baseline_rank=base["rank"].to_numpy(),
+            baseline_flag=base["governance_flag"].to_numpy(),
+        )
+        compared["rank_change"] = compared["baseline_rank"] - compared["rank"]
+        return compared.sort_values(["rank", "country"], ignore_index=True)
+
+
+def inputs_version(year):
+    """inputs_signature of one year's governance flags inputs, leaving out any removed since they were listed."""
+    data_path = partition_path(DATA_PATH, year)
+    signature = inputs_signature([data_path / name for name in input_files(data_path)])
+    return tuple(entry for entry in signature if entry[1] is not None)
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=4)
+def _engine_cached(year, version):
+    data_path = partition_path(DATA_PATH, year)
+    frames = [read_table(data_path / name, columns=REQUIRED_COLUMNS) for name, _, _ in version]
+    with stage("scenario_engine", year=year) as record:
+        engine = ScenarioEngine(pd.concat(frames, ignore_index=True))
+        record["rows"] = engine.rows
+    return engine
+
+
+def load_scenario_engine(year: Optional[int] = None) -> Optional[ScenarioEngine]:
+    """
+    Shared ScenarioEngine for one year's governance flags inputs (default: latest).
+
+    Returns:
+        ScenarioEngine, or None when the year has no inputs
+    """
+    year = year or latest_year()
+    version = inputs_version(year)
+    if not version:
+        return None
+    return _engine_cached(year, version)
+
+
+register_output_hook(_engine_cached.clear)
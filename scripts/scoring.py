@@ -1,4 +1,11 @@
-from typing import Dict
+import hashlib
+import json
+from typing import Dict, Mapping, NamedTuple, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+ArrayLike = Union[np.ndarray, pd.Series, list]
 
 FLAG_WEIGHTS: Dict[str, float] = {
     "digital_procurement": 0.30,
@@ -29,6 +36,135 @@ def calculate_ai_procurement_index(sector_name: str, flags: Dict[str, bool], cou
     score = s * g * country_modifier
     return round(score, 3)
 
+def config_version() -> str:
+    """Return a short hash of FLAG_WEIGHTS and SECTOR_SCORES.
+
+    Any change to the weights or sector scores changes the version, which
+    tells the pipeline that previously computed scores are stale.
+    """
+    config = json.dumps({"flag_weights": FLAG_WEIGHTS, "sector_scores": SECTOR_SCORES}, sort_keys=True)
+    return hashlib.sha256(config.encode()).hexdigest()[:16]
+
+def _as_array(values: ArrayLike) -> np.ndarray:
+    if isinstance(values, pd.Series):
+        return values.to_numpy()
+    return np.asarray(values)
+
+def _round_like_python(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """Vectorized equivalent of the builtin round(x, ndigits) for floats.
+
+    np.round scales by 10**ndigits before rounding, which can disagree with the
+    builtin on values sitting next to a half-way point, so the distinct values
+    among those are rounded with the builtin instead.
+    """
+    factor = 10.0 ** ndigits
+    scaled = values * factor
+    rounded = np.round(scaled) / factor
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_half.any():
+        uniques, inverse = np.unique(values[near_half], return_inverse=True)
+        fixed = np.array([round(float(v), ndigits) for v in uniques])
+        rounded[near_half] = fixed[inverse]
+    return rounded
+
+class LookupTables(NamedTuple):
+    sectors: Tuple[str, ...]
+    sector_scores: np.ndarray
+    governance: np.ndarray
+    index: np.ndarray
+
+_lookup_cache: Dict[tuple, LookupTables] = {}
+
+def _config_key() -> tuple:
+    return tuple(FLAG_WEIGHTS.items()), tuple(SECTOR_SCORES.items())
+
+def lookup_tables() -> LookupTables:
+    """Return the precomputed governance and index lookup tables.
+
+    ``governance[mask]`` is governance_score for a flag bitmask (see encode_flags)
+    and ``index[sector, mask]`` is sector score x governance score. The last
+    sector row holds the default score for sectors missing from SECTOR_SCORES. Tables are rebuilt whenever
+    FLAG_WEIGHTS or SECTOR_SCORES change.
+    """
+    key = _config_key()
+    tables = _lookup_cache.get(key)
+    if tables is None:
+        weights = list(FLAG_WEIGHTS.values())
+        governance = np.zeros(1 << len(weights), dtype=float)
+        for mask in range(len(governance)):
+            # Same summation order as governance_score, so values match exactly
+            governance[mask] = sum(w for bit, w in enumerate(weights) if mask >> bit & 1)
+        sectors = tuple(SECTOR_SCORES)
+        sector_scores = np.array([SECTOR_SCORES[s] for s in sectors] + [get_sector_score(None)])
+        index = sector_scores[:, None] * governance[None, :]
+        tables = LookupTables(sectors, sector_scores, governance, index)
+        _lookup_cache.clear()
+        _lookup_cache[key] = tables
+    return tables
+
+def encode_flags(flags: Mapping[str, ArrayLike]) -> np.ndarray:
+    """Pack boolean flag columns into one uint8 bitmask per row.
+
+    Bit i is set when the i-th flag of FLAG_WEIGHTS is True; flags missing
+    from the mapping count as False.
+    """
+    masks = None
+    for bit, k in enumerate(FLAG_WEIGHTS):
+        if k not in flags:
+            continue
+        column = _as_array(flags[k]).astype(bool).astype(np.uint8) << bit
+        masks = column if masks is None else masks | column
+    return masks if masks is not None else np.zeros(0, dtype=np.uint8)
+
+def sector_codes(sectors: ArrayLike) -> np.ndarray:
+    """Map sector names to row positions in lookup_tables().index."""
+    known = lookup_tables().sectors
+    positions = {s: i for i, s in enumerate(known)}
+    if isinstance(sectors, pd.Series) and isinstance(sectors.dtype, pd.CategoricalDtype):
+        # Reuse the categorical codes; -1 (missing) picks the appended default entry
+        codes, uniques = sectors.cat.codes.to_numpy(), list(sectors.cat.categories) + [None]
+    else:
+        codes, uniques = pd.factorize(_as_array(sectors), use_na_sentinel=False)
+    lookup = np.array([positions.get(s, len(known)) for s in uniques], dtype=np.intp)
+    return lookup[codes]
+
+def get_sector_score_batch(sectors: ArrayLike) -> np.ndarray:
+    """Vectorized get_sector_score."""
+    return lookup_tables().sector_scores[sector_codes(sectors)]
+
+def governance_score_batch(flags: Mapping[str, ArrayLike]) -> np.ndarray:
+    """Vectorized governance_score over columns of flags."""
+    return lookup_tables().governance[encode_flags(flags)]
+
+def calculate_ai_procurement_index_batch(
+    sectors: ArrayLike,
+    flags: Mapping[str, ArrayLike],
+    country_modifier: Union[ArrayLike, float] = 1.0,
+) -> np.ndarray:
+    """Vectorized calculate_ai_procurement_index over whole columns.
+
+    Sector and flags are resolved with a single gather from lookup_tables(),
+    then multiplied by the country modifier.
+
+    Args:
+        sectors: Sector name per row.
+        flags: Mapping of flag name to a boolean column.
+        country_modifier: Modifier per row, or a single value for all rows.
+
+    Returns:
+        np.ndarray: AI procurement index per row, rounded to 3 decimals.
+    """
+    tables = lookup_tables()
+    base = tables.index[sector_codes(sectors), encode_flags(flags)]
+    m = np.broadcast_to(np.asarray(_as_array(country_modifier), dtype=float), base.shape)
+    return _round_like_python(base * m, 3)
+
+def score_frame(df: pd.DataFrame) -> np.ndarray:
+    """Compute the AI procurement index for every row of a governance flags DataFrame."""
+    modifier = df["country_modifier"].astype(float) if "country_modifier" in df.columns else 1.0
+    flags = {k: df[k] for k in FLAG_WEIGHTS}
+    return calculate_ai_procurement_index_batch(df["sector"], flags, modifier)
+
 if __name__ == "__main__":
     # Example usage
     sector = "Aviation"
@@ -0,0 +1,142 @@
+"""
+Monte Carlo sensitivity of country rankings to the scoring assumptions.
+
+Thousands of FLAG_WEIGHTS and SECTOR_SCORES samples are drawn around the
+current config (each value scaled by a random factor within +/- spread)
+and scored in batches with ScenarioEngine.score_samples, one matrix
+product per batch. Batches run in worker processes for large inputs and
+are seeded individually, so results do not depend on the worker count.
+"""
+
+import os
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from scripts.data_loader import CACHE_TTL, latest_year
+from scripts.instrumentation import stage
+from scripts.pipeline import GOVERNANCE_THRESHOLD, map_inputs
+from scripts.scenarios import Scenario, ScenarioEngine, inputs_version, load_scenario_engine
+from scripts.scoring import FLAG_WEIGHTS, get_sector_score
+
+
+DEFAULT_SAMPLES = 2000
+DEFAULT_SPREAD = 0.2
+BATCH_SIZE = 250
+
+# Below this many (country, sector) pairs x samples, worker processes cost more than they save
+PARALLEL_MIN_CELLS = 20_000_000
+
+
+class SensitivityResult(NamedTuple):
+    # country, baseline_rank, rank_p05, rank_median, rank_p95, prob_high,
+    # score_mean, sorted by median rank
+    countries: pd.DataFrame
+    samples: int
+    spread: float
+
+
+def sample_config(engine, size, spread, seed):
+    """
+    Draw (flag_weights, sector_scores) samples around the current config.
+
+    Returns:
+        tuple: (size, flags) and (size, sectors) arrays; sector scores are
+            clipped to [0, 1]
+    """
+    rng = np.random.default_rng(seed)
+    weights = np.array(list(FLAG_WEIGHTS.values()))
+    sector_scores = np.array([get_sector_score(s) for s in engine.sectors])
+    flag_samples = weights * rng.uniform(1 - spread, 1 + spread, (size, len(weights)))
+    sector_samples = sector_scores * rng.uniform(1 - spread, 1 + spread, (size, len(sector_scores)))
+    return flag_samples, np.clip(sector_samples, 0.0, 1.0)
+
+
+def _rank_batch(engine, size, spread, seed, governance_threshold):
+    """Score one batch of samples; runs in a worker process for large inputs."""
+    flag_samples, sector_samples = sample_config(engine, size, spread, seed)
+    scores, governance = engine.score_samples(flag_samples, sector_samples)
+    # Rank 1 = highest score in each sample
+    order = np.argsort(-scores, axis=0, kind="stable")
+    ranks = np.empty(order.shape, dtype=np.int32)
+    np.put_along_axis(ranks, order, np.arange(1, len(scores) + 1, dtype=np.int32)[:, None], axis=0)
+    return ranks, (governance >= governance_threshold).sum(axis=1), scores.sum(axis=1)
+
+
+def run_sensitivity(
+    engine: ScenarioEngine,
+    samples: int = DEFAULT_SAMPLES,
+    spread: float = DEFAULT_SPREAD,
+    governance_threshold: float = GOVERNANCE_THRESHOLD,
+    seed: int = 0,
+    workers: Optional[int] = None,
+) -> SensitivityResult:
+    """
+    Sample the scoring config and summarise each country's rank and flag.
+
+    Args:
+        engine: ScenarioEngine over the governance flags rows
+        samples: Number of config samples
+        spread: Relative range of each sampled value, e.g. 0.2 = +/-20%
+        governance_threshold: Average governance score for HIGH
+        seed: Random seed; batch i uses (seed, i)
+        workers: Worker processes (default: one per CPU for large inputs)
+
+    Returns:
+        SensitivityResult
+    """
+    sizes = [min(BATCH_SIZE, samples - start) for start in range(0, samples, BATCH_SIZE)]
+    if workers is None:
+        cells = engine.pairs * samples
+        workers = 1 if cells < PARALLEL_MIN_CELLS else min(len(sizes), os.cpu_count() or 1)
+
+    with stage("sensitivity", samples=samples, countries=len(engine.countries), workers=workers):
+        batches = map_inputs(
+            _rank_batch,
+            [(engine, size, spread, (seed, i), governance_threshold) for i, size in enumerate(sizes)],
+            workers,
+        )
+    ranks = np.concatenate([batch[0] for batch in batches], axis=1)
+    high = sum(batch[1] for batch in batches)
+    score_sums = sum(batch[2] for batch in batches)
+
+    p05, median, p95 = np.percentile(ranks, [5, 50, 95], axis=1)
+    countries = pd.DataFrame({
+        "country": engine.countries,
+        "baseline_rank": engine.run(Scenario.create(governance_threshold=governance_threshold)).countries["rank"],
+        "rank_p05": p05,
+        "rank_median": median,
+        "rank_p95": p95,
+        "prob_high": high / samples,
+        "score_mean": score_sums / samples,
+    })
+    countries = countries.sort_values(["rank_median", "baseline_rank"], ignore_index=True)
+    return SensitivityResult(countries, samples, spread)
+
+
+# Keyed on the input version, so pipeline runs that leave the inputs
+# unchanged keep the (comparatively expensive) results
+@st.cache_data(ttl=CACHE_TTL, max_entries=8)
+def _sensitivity_cached(year, version, samples, spread):
+    return run_sensitivity(load_scenario_engine(year), samples, spread)
+
+
+def load_sensitivity(
+    year: Optional[int] = None,
+    samples: int = DEFAULT_SAMPLES,
+    spread: float = DEFAULT_SPREAD,
+) -> Optional[SensitivityResult]:
+    """
+    Sensitivity of one year's rankings (default: latest), cached per input version.
+
+    Returns:
+        SensitivityResult, or None when the year has no inputs
+    """
+    year = year or latest_year()
+    version = inputs_version(year)
+    if not version:
+        return None
+    return _sensitivity_cached(year, version, samples, spread)
+
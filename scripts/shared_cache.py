@@ -0,0 +1,124 @@
+"""
+Disk-backed dataset cache shared by every process using a data directory.
+
+st.cache_data and st.cache_resource are per process, so each app replica
+parses and holds its own copy of every dataset. Loaded datasets are
+therefore also materialized once per dataset version as uncompressed
+Feather files under DATA_PATH/_shared_cache, which every process
+memory-maps: the OS page cache holds one physical copy for all replicas,
+and a replica started after a deploy reads the existing snapshots instead
+of re-parsing CSVs. Snapshot names include a hash of the dataset version,
+so a new version never reuses a stale file.
+
+Snapshots of datasets with a country column are written grouped by country,
+with each country's row range in the file's schema metadata, so
+CountryIndex slices the mapped frame in place instead of reordering a copy
+of it in every process. Their rows are therefore in country order.
+"""
+
+import hashlib
+import json
+import os
+import weakref
+from typing import Dict, Optional
+
+import pandas as pd
+
+from scripts.country_index import partition_by_country
+from scripts.instrumentation import file_size, stage
+from scripts.storage import COLUMNAR_SUFFIX, feather, read_feather, write_feather
+
+
+CACHE_DIR = "_shared_cache"
+
+# Bumped whenever the snapshot layout changes, so older files are not reused
+SNAPSHOT_FORMAT = 2
+
+# Schema metadata key of a snapshot's {country: [start, stop]} row ranges
+COUNTRY_OFFSETS_KEY = b"algoecon.country_offsets"
+
+# Set ALGOECON_SHARED_CACHE=0 to load every dataset in-process only
+SHARED_CACHE_ENABLED = feather is not None and os.environ.get("ALGOECON_SHARED_CACHE", "1") != "0"
+
+
+def snapshot_path(data_path, name, year, version):
+    """
+    Path of a dataset version's shared snapshot.
+
+    Args:
+        year: Year partition, or None for datasets that are not partitioned
+        version: Dataset version token (see data_loader.dataset_version)
+    """
+    key = hashlib.sha1(repr((SNAPSHOT_FORMAT, version)).encode()).hexdigest()[:16]
+    return data_path / CACHE_DIR / f"{name}.{year or 'all'}.{key}{COLUMNAR_SUFFIX}"
+
+
+# id(frame) -> (weak reference to the frame, its country slices), for frames
+# read from snapshots; derived frames are not registered
+_country_slices = {}
+
+
+def _register_slices(df, slices):
+    key = id(df)
+    _country_slices[key] = (weakref.ref(df, lambda _: _country_slices.pop(key, None)), slices)
+
+
+def country_slices(df) -> Optional[Dict[str, slice]]:
+    """
+    Row range of each country in a frame returned by read_snapshot or write_snapshot.
+
+    Returns:
+        dict: {country: slice}, or None for any other frame, including
+            frames derived from a snapshot's
+    """
+    entry = _country_slices.get(id(df))
+    if entry is None or entry[0]() is not df:
+        return None
+    return entry[1]
+
+
+def read_snapshot(path) -> Optional[pd.DataFrame]:
+    """Memory-map a shared snapshot, or return None if it does not exist."""
+    if not path.exists():
+        return None
+    with stage("shared_cache_read", file=path.name, bytes_read=file_size(path)) as record:
+        try:
+            df, metadata = read_feather(path)
+        except FileNotFoundError:  # pruned by another process meanwhile
+            record["status"] = "missing"
+            return None
+        record["rows"] = len(df)
+    offsets = metadata.get(COUNTRY_OFFSETS_KEY)
+    if offsets is not None:
+        _register_slices(df, {country: slice(*rows) for country, rows in json.loads(offsets).items()})
+    return df
+
+
+def write_snapshot(df, path) -> pd.DataFrame:
+    """
+    Materialize df as a shared snapshot and return it memory-mapped.
+
+    Rows are grouped by country when df has a country column (see
+    country_slices). Snapshots of the same dataset and year with other
+    versions are removed. Concurrent writers of one version produce
+    identical files, so whichever rename lands last wins harmlessly.
+    """
+    path.parent.mkdir(exist_ok=True)
+    with stage("shared_cache_write", file=path.name, rows=len(df)) as record:
+        metadata = {}
+        if not df.empty and "country" in df.columns:
+            df, slices = partition_by_country(df)
+            offsets = {str(country): [rows.start, rows.stop] for country, rows in slices.items()}
+            metadata[COUNTRY_OFFSETS_KEY] = json.dumps(offsets).encode()
+        write_feather(df, path, metadata)
+        record["bytes_written"] = file_size(path)
+    prefix = path.name.rsplit(".", 2)[0]
+    for stale in path.parent.glob(f"{prefix}.*{COLUMNAR_SUFFIX}"):
+        if stale != path:
+            try:
+                # Processes still mapping the old version keep their pages until they reload
+                stale.unlink()
+            except OSError:
+                pass
+    shared = read_snapshot(path)
+    return df if shared is None else shared
@@ -0,0 +1,366 @@
+"""
+Embedded SQLite store for the pipeline's tables.
+
+An alternative to re-reading whole CSVs: with ALGOECON_SQLITE=1 the
+pipeline also syncs every year partition it writes into one SQLite
+database in DATA_PATH, inside a single transaction, and the loaders query
+it by year (and optionally country/sector) through indexes on
+(country, year, sector). The database runs in WAL mode, so readers keep
+seeing the last committed partition while the pipeline writes the next.
+
+Rows are keyed by a hash of their contents, so syncing an input only
+inserts its new rows and deletes its removed ones; inputs whose version
+(content hash and scoring config) is already stored are skipped.
+
+Tables:
+    governance_inputs: governance flags inputs with their computed
+        ai_procurement_index, keyed by (year, source file, row key)
+    governance_flags: HIGH/LOW flag per (year, country)
+    opportunity_scores: procurement readiness scores, keyed by
+        (year, source file, row key)
+    source_versions: version of each (year, source file) last synced
+    table_versions: a counter per (table, year), bumped on every write
+        that changes the table, that loaders use as a cheap cache key
+"""
+
+import os
+import sqlite3
+from contextlib import closing
+from typing import Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from scripts.instrumentation import file_size, stage
+from scripts.storage import Frames, iter_chunks, to_compact
+
+
+DB_FILE = "algoeconomics.sqlite"
+
+# Set ALGOECON_SQLITE=1 to write and read the SQLite store
+SQLITE_ENABLED = os.environ.get("ALGOECON_SQLITE") == "1"
+
+FLAG_COLUMNS = ("digital_procurement", "open_contracting", "ai_policy", "vendor_transparency")
+
+# Bumped whenever SCHEMA changes incompatibly; older stores are rebuilt
+SCHEMA_VERSION = 2
+
+# Page cache of the writing connection, in KiB
+WRITE_CACHE_KB = 256 * 1024
+
+# Tables dropped when an older store is rebuilt
+TABLES = ("governance_inputs", "governance_flags", "opportunity_scores", "source_versions", "table_versions")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS governance_inputs (
+    year INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    row_key INTEGER NOT NULL,
+    country TEXT NOT NULL,
+    sector TEXT NOT NULL,
+    digital_procurement INTEGER NOT NULL,
+    open_contracting INTEGER NOT NULL,
+    ai_policy INTEGER NOT NULL,
+    vendor_transparency INTEGER NOT NULL,
+    country_modifier REAL NOT NULL,
+    ai_procurement_index REAL,
+    PRIMARY KEY (year, source, row_key)
+);
+CREATE INDEX IF NOT EXISTS governance_inputs_country_year_sector
+    ON governance_inputs (country, year, sector);
+
+CREATE TABLE IF NOT EXISTS governance_flags (
+    year INTEGER NOT NULL,
+    country TEXT NOT NULL,
+    governance_flag TEXT NOT NULL,
+    PRIMARY KEY (year, country)
+);
+CREATE INDEX IF NOT EXISTS governance_flags_country_year
+    ON governance_flags (country, year);
+
+CREATE TABLE IF NOT EXISTS opportunity_scores (
+    year INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    row_key INTEGER NOT NULL,
+    country TEXT NOT NULL,
+    sector TEXT NOT NULL,
+    procurement_readiness_score REAL NOT NULL,
+    PRIMARY KEY (year, source, row_key)
+);
+CREATE INDEX IF NOT EXISTS opportunity_scores_country_year_sector
+    ON opportunity_scores (country, year, sector);
+
+CREATE TABLE IF NOT EXISTS source_versions (
+    year INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    version TEXT NOT NULL,
+    PRIMARY KEY (year, source)
+);
+
+CREATE TABLE IF NOT EXISTS table_versions (
+    name TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (name, year)
+);
+"""
+
+# Columns returned for each table, in the same order as the CSV outputs
+COLUMNS = {
+    "governance_inputs": ("country", "sector") + FLAG_COLUMNS + ("country_modifier", "ai_procurement_index"),
+    "governance_flags": ("country", "year", "governance_flag"),
+    "opportunity_scores": ("country", "year", "sector", "procurement_readiness_score"),
+}
+
+# Columns stored per row of the tables synced by source
+SYNCED_COLUMNS = {
+    "governance_inputs": COLUMNS["governance_inputs"],
+    "opportunity_scores": ("country", "sector", "procurement_readiness_score"),
+}
+
+
+def db_path(data_path):
+    return data_path / DB_FILE
+
+
+def connect(data_path, create=False):
+    """Open the store in data_path; create=True also creates its schema."""
+    conn = sqlite3.connect(db_path(data_path), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL makes NORMAL durable against application crashes and much faster than FULL
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if create:
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            conn.executescript("".join(f"DROP TABLE IF EXISTS {table};" for table in TABLES))
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.executescript(SCHEMA)
+    return conn
+
+
+def _rows(df, columns):
+    # Series iteration yields Python scalars, which sqlite3 can bind
+    return zip(*(df[col] for col in columns))
+
+
+class _Occurrences:
+    """Running count of the rows seen per content hash, across the chunks of one source."""
+
+    def __init__(self):
+        self._hashes = np.empty(0, dtype=np.uint64)  # sorted
+        self._counts = np.empty(0, dtype=np.int64)
+
+    def number(self, hashes):
+        """How many rows with the same hash came before each row."""
+        unique, inverse, counts = np.unique(hashes, return_inverse=True, return_counts=True)
+        positions = np.searchsorted(self._hashes, unique)
+        found = positions < len(self._hashes)
+        found[found] = self._hashes[positions[found]] == unique[found]
+        before = np.zeros(len(unique), dtype=np.int64)
+        before[found] = self._counts[positions[found]]
+        self._counts[positions[found]] += counts[found]
+        self._hashes = np.insert(self._hashes, positions[~found], unique[~found])
+        self._counts = np.insert(self._counts, positions[~found], counts[~found])
+        within = pd.Series(inverse).groupby(inverse).cumcount().to_numpy()
+        return before[inverse] + within
+
+
+def _row_keys(df, columns, occurrences):
+    """
+    Stable identity of each row: a hash of its stored values.
+
+    Identical rows are told apart by their occurrence number, so their keys
+    stay the same however the rows around them change.
+    """
+    # Hash the float64 values SQLite stores, whatever the frame's float width
+    values = df[list(columns)].astype({col: "float64" for col in columns if df[col].dtype == "float32"})
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+    occurrence = occurrences.number(hashes)
+    repeated = occurrence > 0
+    if repeated.any():
+        hashes = hashes.copy()
+        hashes[repeated] = pd.util.hash_array(hashes[repeated] ^ occurrence[repeated].astype(np.uint64))
+    return hashes.view(np.int64)
+
+
+def _sync_source(conn, table, year, source, frames):
+    """
+    Make a source's rows in table match frames, touching only the rows that differ.
+
+    Returns:
+        tuple: (rows inserted, rows deleted)
+    """
+    columns = SYNCED_COLUMNS[table]
+    existing = pd.Index(pd.read_sql_query(
+        f"SELECT row_key FROM {table} WHERE year = ? AND source = ?", conn, params=(year, source)
+    )["row_key"].to_numpy(dtype=np.int64))
+    occurrences = _Occurrences()
+    current = []
+    inserted = 0
+    for chunk in iter_chunks(frames):
+        keys = _row_keys(chunk, columns, occurrences)
+        new = existing.get_indexer(keys) < 0
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {table} (year, source, row_key, {', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in range(3 + len(columns)))})",
+            ((year, source, int(key)) + row for key, row in zip(keys[new], _rows(chunk[new], columns))),
+        )
+        current.append(keys)
+        inserted += int(new.sum())
+    removed = existing[~existing.isin(np.concatenate(current) if current else [])]
+    conn.executemany(
+        f"DELETE FROM {table} WHERE year = ? AND source = ? AND row_key = ?",
+        ((year, source, int(key)) for key in removed),
+    )
+    return inserted, len(removed)
+
+
+def stale_sources(data_path, year: int, versions: Mapping[str, str]) -> list:
+    """Sources whose version differs from (or is missing in) the store's, in versions order."""
+    stored = {}
+    if db_path(data_path).exists():
+        with closing(connect(data_path)) as conn:
+            try:
+                stored = dict(conn.execute("SELECT source, version FROM source_versions WHERE year = ?", (year,)))
+            except sqlite3.OperationalError:  # schema not created yet
+                pass
+    return [source for source, version in versions.items() if stored.get(source) != version]
+
+
+def _upsert(conn, table, key, columns, rows):
+    placeholders = ", ".join("?" for _ in key + columns)
+    updates = ", ".join(f"{col} = excluded.{col}" for col in columns)
+    conn.executemany(
+        f"INSERT INTO {table} ({', '.join(key + columns)}) VALUES ({placeholders}) "
+        f"ON CONFLICT ({', '.join(key)}) DO UPDATE SET {updates}",
+        rows,
+    )
+
+
+def _bump_version(conn, name, year):
+    conn.execute(
+        "INSERT INTO table_versions (name, year, version) VALUES (?, ?, 1) "
+        "ON CONFLICT (name, year) DO UPDATE SET version = version + 1",
+        (name, year),
+    )
+
+
+def write_partition(
+    data_path,
+    year: int,
+    scored: Mapping[str, Frames],
+    governance_df: pd.DataFrame,
+    opportunity: Mapping[str, Frames],
+    versions: Mapping[str, str],
+):
+    """
+    Sync one year partition's tables in a single transaction.
+
+    Only the sources in scored are synced, each inserting its new rows and
+    deleting its removed ones; sources missing from versions are deleted,
+    and governance flags are upserted where they changed. The year then
+    matches the pipeline's outputs. Readers see either the old or the new
+    partition, never a mix.
+
+    Args:
+        data_path: Directory holding the store (DATA_PATH)
+        year: Partition year
+        scored: {input file name: scored governance flags rows or chunks}
+            for the sources to sync (see stale_sources)
+        governance_df: country, year, governance_flag
+        opportunity: {input file name: its opportunity score rows or chunks},
+            for the same sources as scored
+        versions: {input file name: version} of every current source
+    """
+    with stage("sqlite_write", year=year, sources=len(scored)) as record, \
+            closing(connect(data_path, create=True)) as conn, conn:
+        # Row keys are hashes, so inserts land all over the key index: keep it cached
+        conn.execute(f"PRAGMA cache_size = -{WRITE_CACHE_KB}")
+        changed = set()
+        rows = 0
+        for source, frames in scored.items():
+            for table, table_frames in (("governance_inputs", frames), ("opportunity_scores", opportunity[source])):
+                inserted, deleted = _sync_source(conn, table, year, source, table_frames)
+                if inserted or deleted:
+                    changed.add(table)
+                rows += inserted + deleted
+            _upsert(conn, "source_versions", ("year", "source"), ("version",), [(year, source, versions[source])])
+
+        removed = [
+            source for (source,) in conn.execute("SELECT source FROM source_versions WHERE year = ?", (year,))
+            if source not in versions
+        ]
+        for source in removed:
+            for table in SYNCED_COLUMNS:
+                if conn.execute(f"DELETE FROM {table} WHERE year = ? AND source = ?", (year, source)).rowcount:
+                    changed.add(table)
+            conn.execute("DELETE FROM source_versions WHERE year = ? AND source = ?", (year, source))
+
+        flags = dict(zip(governance_df["country"].astype(str), governance_df["governance_flag"].astype(str)))
+        stored = dict(conn.execute("SELECT country, governance_flag FROM governance_flags WHERE year = ?", (year,)))
+        stale = [(year, country) for country in stored if country not in flags]
+        updates = [(year, country, flag) for country, flag in flags.items() if stored.get(country) != flag]
+        conn.executemany("DELETE FROM governance_flags WHERE year = ? AND country = ?", stale)
+        _upsert(conn, "governance_flags", ("year", "country"), ("governance_flag",), updates)
+        if stale or updates:
+            changed.add("governance_flags")
+
+        for name in COLUMNS:
+            versioned = conn.execute(
+                "SELECT 1 FROM table_versions WHERE name = ? AND year = ?", (name, year)
+            ).fetchone()
+            if name in changed or versioned is None:
+                _bump_version(conn, name, year)
+        record.update(rows=rows, bytes_written=file_size(db_path(data_path)))
+
+
+def table_version(data_path, name: str, year: int) -> Optional[int]:
+    """Write counter of a table's year, or None if it was never written."""
+    if not db_path(data_path).exists():
+        return None
+    with closing(connect(data_path)) as conn:
+        try:
+            row = conn.execute(
+                "SELECT version FROM table_versions WHERE name = ? AND year = ?", (name, year)
+            ).fetchone()
+        except sqlite3.OperationalError:  # schema not created yet
+            return None
+    return row[0] if row else None
+
+
+def query(
+    data_path,
+    name: str,
+    year: int,
+    country: Optional[str] = None,
+    sector: Optional[str] = None,
+    dtypes=None,
+) -> pd.DataFrame:
+    """
+    Read a table's rows for one year, optionally for one country and sector.
+
+    Country (and sector) filters use the (country, year, sector) index, so
+    point lookups do not scan the table.
+
+    Returns:
+        pd.DataFrame: the table's COLUMNS; inputs and opportunity scores are
+            grouped by source file, in the order they were stored
+    """
+    columns = COLUMNS[name]
+    conditions, params = ["year = ?"], [year]
+    if country is not None:
+        conditions.append("country = ?")
+        params.append(country)
+    if sector is not None and name != "governance_flags":
+        conditions.append("sector = ?")
+        params.append(sector)
+    order = "country" if name == "governance_flags" else "source, rowid"
+    sql = f"SELECT {', '.join(columns)} FROM {name} WHERE {' AND '.join(conditions)} ORDER BY {order}"
+    with stage("sqlite_query", table=name, year=year, country=country) as record, \
+            closing(connect(data_path)) as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+        record["rows"] = len(df)
+    for col in FLAG_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(bool)
+    df = to_compact(df)
+    return df.astype({col: dtype for col, dtype in (dtypes or {}).items() if col in df.columns})
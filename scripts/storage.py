@@ -0,0 +1,200 @@
+"""
+Dtype-compact, columnar storage for the processed datasets.
+
+CSV stays the interchange format in data/processed, but every table written
+through write_table also gets an Arrow IPC (Feather) snapshot next to it when
+pyarrow is installed. read_table prefers that snapshot, memory-mapping it
+instead of re-parsing text, and falls back to the CSV with an explicit
+compact schema.
+
+Tables are written to a temporary file and renamed over the target, so
+readers in other processes never see a partially written file.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Union
+
+import pandas as pd
+
+from scripts.instrumentation import file_size, stage
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional; CSV alone still works
+    pa = feather = None
+
+
+COLUMNAR_SUFFIX = ".feather"
+
+# Set ALGOECON_COLUMNAR=0 to stop writing Feather snapshots
+COLUMNAR_ENABLED = os.environ.get("ALGOECON_COLUMNAR", "1") != "0"
+
+_FLAG_DTYPES = {
+    "digital_procurement": "bool",
+    "open_contracting": "bool",
+    "ai_policy": "bool",
+    "vendor_transparency": "bool",
+}
+
+# Explicit column dtypes. country_modifier and ai_procurement_index stay
+# float64 so scores computed from stored data match the scalar scoring exactly.
+COLUMN_DTYPES = {
+    "country": "category",
+    "sector": "category",
+    "year": "int16",
+    "governance_flag": "category",
+    "country_modifier": "float64",
+    "ai_procurement_index": "float64",
+    "procurement_readiness_score": "float32",
+    "passenger_volume": "int64",
+    "inbound_tourists": "int64",
+    **_FLAG_DTYPES,
+}
+
+# A whole table, or its chunks as read or scored by a streaming run
+Frames = Union[pd.DataFrame, Iterable[pd.DataFrame]]
+
+
+def columnar_path(csv_path):
+    """Path of the Feather snapshot kept alongside a CSV."""
+    return csv_path.with_suffix(COLUMNAR_SUFFIX)
+
+
+def _csv_dtypes(csv_path, dtypes=None):
+    dtypes = {**COLUMN_DTYPES, **(dtypes or {})}
+    header = pd.read_csv(csv_path, nrows=0).columns
+    return {col: dtypes[col] for col in header if col in dtypes}
+
+
+def _snapshot_is_fresh(csv_path, snapshot_path):
+    try:
+        snapshot_mtime = snapshot_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+    try:
+        return snapshot_mtime >= csv_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return True
+
+
+def read_table(csv_path, columns=None, dtypes=None):
+    """
+    Read a processed dataset, preferring its memory-mapped Feather snapshot.
+
+    The snapshot is used only when it is at least as new as the CSV. The CSV
+    fallback parses with the compact dtypes of COLUMN_DTYPES, reverting to
+    inferred dtypes for columns that do not fit them (e.g. missing years).
+
+    Args:
+        csv_path: Path of the dataset's CSV file
+        columns: Optional subset of columns to read
+        dtypes: Optional dtypes overriding COLUMN_DTYPES for the CSV fallback
+
+    Raises:
+        FileNotFoundError: If neither the snapshot nor the CSV exists
+    """
+    snapshot_path = columnar_path(csv_path)
+    with stage("read", file=csv_path.name) as record:
+        if feather is not None and _snapshot_is_fresh(csv_path, snapshot_path):
+            record.update(format="feather", bytes_read=file_size(snapshot_path))
+            df, _ = read_feather(snapshot_path, columns)
+        else:
+            record.update(format="csv", bytes_read=file_size(csv_path))
+            dtypes = _csv_dtypes(csv_path, dtypes)
+            try:
+                df = pd.read_csv(csv_path, usecols=columns, dtype=dtypes)
+            except (ValueError, TypeError):
+                df = pd.read_csv(csv_path, usecols=columns)
+        record["rows"] = len(df)
+    return df
+
+
+def read_feather(path, columns=None):
+    """
+    Memory-map a Feather file written by write_feather.
+
+    Returns:
+        tuple: (DataFrame, schema metadata dict)
+    """
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    # split_blocks lets numeric columns stay zero-copy views of the mapping
+    return table.to_pandas(split_blocks=True), table.schema.metadata or {}
+
+
+def write_feather(df, path, metadata=None):
+    """
+    Atomically write df as an uncompressed Feather file for read_feather.
+
+    Args:
+        metadata: Optional {bytes: bytes} added to the schema metadata
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if metadata:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+    with atomic_path(path) as tmp:
+        # One record batch, so memory-mapped reads need no concatenation copy
+        feather.write_feather(table, tmp, compression="uncompressed", chunksize=max(len(df), 1))
+
+
+def to_compact(df):
+    """Cast known columns to their COLUMN_DTYPES, leaving others untouched."""
+    compact = {}
+    for col, dtype in COLUMN_DTYPES.items():
+        if col not in df.columns or str(df[col].dtype) == dtype:
+            continue
+        if dtype in ("int16", "int64", "bool") and df[col].isna().any():
+            continue
+        compact[col] = dtype
+    return df.astype(compact) if compact else df
+
+
+def iter_chunks(frames: Frames):
+    """Iterate over frames' chunks; a single DataFrame is one chunk."""
+    return [frames] if isinstance(frames, pd.DataFrame) else frames
+
+
+@contextmanager
+def atomic_path(path):
+    """
+    Yield a temporary path next to path, renamed over path on success.
+
+    The temporary file is removed if the block raises, leaving path as it was.
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def write_table(df, csv_path):
+    """
+    Write a dataset as CSV plus, when enabled, a compact Feather snapshot.
+
+    The CSV is replaced first, so until the new snapshot lands the old one
+    is older than the CSV and read_table ignores it.
+    """
+    with stage("write", file=csv_path.name, rows=len(df)) as record:
+        with atomic_path(csv_path) as tmp:
+            df.to_csv(tmp, index=False)
+        bytes_written = file_size(csv_path)
+        if feather is not None and COLUMNAR_ENABLED:
+            write_feather(to_compact(df), columnar_path(csv_path))
+            bytes_written += file_size(columnar_path(csv_path))
+        record["bytes_written"] = bytes_written
+
+
+def remove_columnar_snapshot(csv_path):
+    """Delete a CSV's Feather snapshot, e.g. after the CSV was written without one."""
+    try:
+        columnar_path(csv_path).unlink()
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,102 @@
+"""
+Synthetic datasets at production scale for benchmarking.
+
+Writes governance flags (one file per sector), passenger flow, cargo flow
+and tourism inbound tables with the same schemas as data/processed.
+
+Usage:
+    python scripts/synthetic_data.py OUTPUT_DIR --rows 1000000
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.scoring import FLAG_WEIGHTS
+
+
+# Sector name -> governance flags file, matching the pipeline's input pattern
+SECTOR_FILES = {
+    "Aviation": "fact_aviation_governance_flags.csv",
+    "Tourism & Hospitality": "fact_tourism_governance_flags.csv",
+}
+
+
+def country_names(n):
+    return np.array([f"Country {i:05d}" for i in range(n)], dtype=object)
+
+
+def default_countries(rows):
+    """Number of countries/regions for a table size: ~100 rows each, 10 to 5000."""
+    return int(min(5000, max(10, rows // 100)))
+
+
+def governance_flags(rows, sector, countries, rng):
+    """Random governance flags rows for one sector."""
+    df = pd.DataFrame({
+        "country": countries[rng.integers(0, len(countries), rows)],
+        "sector": sector,
+    })
+    for flag in FLAG_WEIGHTS:
+        df[flag] = rng.random(rows) < 0.6
+    df["country_modifier"] = rng.choice([0.90, 0.95, 1.00, 1.05, 1.10], rows)
+    return df
+
+
+def country_year_table(rows, value_column, countries, rng, low, high):
+    """Random (country, year, value) rows, e.g. route flows."""
+    return pd.DataFrame({
+        "country": countries[rng.integers(0, len(countries), rows)],
+        "year": rng.integers(2010, 2024, rows),
+        value_column: rng.integers(low, high, rows),
+    })
+
+
+def generate_dataset(output_dir, rows, n_countries=None, seed=0):
+    """
+    Write a full synthetic data/processed directory.
+
+    Args:
+        output_dir: Directory to write the CSVs into (created if missing)
+        rows: Rows per table (governance rows are split across sectors)
+        n_countries: Distinct countries (default: default_countries(rows))
+        seed: Random seed, so runs are reproducible
+
+    Returns:
+        Path: output_dir
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    countries = country_names(n_countries or default_countries(rows))
+
+    per_sector = max(1, rows // len(SECTOR_FILES))
+    for sector, file_name in SECTOR_FILES.items():
+        governance_flags(per_sector, sector, countries, rng).to_csv(output_dir / file_name, index=False)
+
+    country_year_table(rows, "passenger_volume", countries, rng, 1_000, 5_000_000).to_csv(
+        output_dir / "fact_route_passenger_flow.csv", index=False
+    )
+    country_year_table(rows, "cargo_tonnage", countries, rng, 10, 500_000).to_csv(
+        output_dir / "fact_route_cargo_flow.csv", index=False
+    )
+    country_year_table(rows, "inbound_tourists", countries, rng, 1_000, 10_000_000).to_csv(
+        output_dir / "fact_tourism_inbound.csv", index=False
+    )
+    return output_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic AlgoEconomics datasets")
+    parser.add_argument("output_dir", help="Directory to write the CSVs into")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows per table")
+    parser.add_argument("--countries", type=int, default=None, help="Distinct countries")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generate_dataset(args.output_dir, args.rows, args.countries, args.seed)
+    print(f"Generated synthetic datasets with {args.rows:,} rows in {args.output_dir}")
@@ -0,0 +1,109 @@
+"""
+Materialized views joining pipeline outputs with other datasets.
+
+The tourism view joins inbound tourist volumes with each country's tourism
+procurement readiness and governance flag, one row per country, so the
+dashboard reads precomputed figures instead of joining on every rerun.
+The pipeline refreshes it (see pipeline._refresh_tourism_view) when the
+scores or the inbound volumes change, reusing the unchanged side.
+"""
+
+import numpy as np
+import pandas as pd
+
+from scripts.storage import Frames, iter_chunks
+
+
+TOURISM_INBOUND_FILE = "fact_tourism_inbound.csv"
+TOURISM_VIEW_FILE = "fact_tourism_opportunity_view.csv"
+TOURISM_SECTOR = "Tourism & Hospitality"
+
+# Columns taken from each side of the join
+INBOUND_COLUMNS = ["country", "inbound_year", "inbound_tourists"]
+SCORE_COLUMNS = ["country", "procurement_readiness_score", "governance_flag"]
+
+
+def inbound_as_of(inbound: Frames, year: int) -> pd.DataFrame:
+    """
+    Each country's inbound tourists in its latest year up to year.
+
+    Rows of the same country and year are summed, so chunks can be passed
+    as read.
+
+    Returns:
+        pd.DataFrame: INBOUND_COLUMNS
+    """
+    totals = []
+    for chunk in iter_chunks(inbound):
+        chunk = chunk[chunk["year"] <= year]
+        totals.append(chunk.groupby(["country", "year"], observed=True)["inbound_tourists"].sum())
+    if not totals:
+        return pd.DataFrame(columns=INBOUND_COLUMNS)
+    per_year = pd.concat(totals).groupby(level=["country", "year"]).sum().reset_index()
+    latest = per_year.sort_values("year").groupby("country", observed=True).tail(1)
+    return pd.DataFrame({
+        "country": latest["country"].astype(str).to_numpy(),
+        "inbound_year": latest["year"].to_numpy(),
+        "inbound_tourists": latest["inbound_tourists"].to_numpy(),
+    })
+
+
+def sector_scores(opportunity: Frames, governance_df: pd.DataFrame, sector: str = TOURISM_SECTOR) -> pd.DataFrame:
+    """
+    Mean procurement readiness of one sector per country, with its governance flag.
+
+    Returns:
+        pd.DataFrame: SCORE_COLUMNS
+    """
+    sums, counts = [], []
+    for chunk in iter_chunks(opportunity):
+        rows = chunk[chunk["sector"] == sector]
+        grouped = rows.groupby("country", observed=True)["procurement_readiness_score"]
+        sums.append(grouped.sum())
+        counts.append(grouped.count())
+    if not sums:
+        return pd.DataFrame(columns=SCORE_COLUMNS)
+    mean = pd.concat(sums).groupby(level=0).sum() / pd.concat(counts).groupby(level=0).sum()
+    flags = governance_df.set_index(governance_df["country"].astype(str))["governance_flag"].astype(str)
+    countries = mean.index.astype(str)
+    return pd.DataFrame({
+        "country": countries,
+        "procurement_readiness_score": mean.to_numpy(dtype=float).round(1),
+        "governance_flag": flags.reindex(countries).to_numpy(),
+    })
+
+
+def build_tourism_view(inbound: pd.DataFrame, scores: pd.DataFrame, year: int) -> pd.DataFrame:
+    """
+    Join per-country inbound volumes and tourism scores into the view.
+
+    Countries with scores but no inbound volumes are kept with missing
+    volumes. Derived metrics:
+        inbound_share: share of all inbound tourists in the view
+        weighted_readiness: readiness x inbound_share; summed over countries
+            it gives the volume-weighted readiness
+        opportunity_size: inbound tourists x readiness / 100, i.e. visitors
+            reached at the country's procurement readiness
+
+    Returns:
+        pd.DataFrame: one row per country, sorted by country
+    """
+    scores = scores[SCORE_COLUMNS].astype({"country": str, "governance_flag": object})
+    inbound = inbound[INBOUND_COLUMNS].astype({"country": str})
+    view = scores.merge(inbound, on="country", how="left")
+    view = view.sort_values("country", ignore_index=True)
+    volume = view["inbound_tourists"].astype(float)
+    total = volume.sum()
+    share = volume / total if total else volume * np.nan
+    return pd.DataFrame({
+        "country": view["country"],
+        "year": year,
+        "inbound_year": view["inbound_year"],
+        "inbound_tourists": view["inbound_tourists"],
+        "procurement_readiness_score": view["procurement_readiness_score"],
+        "governance_flag": view["governance_flag"],
+        # Unrounded, so that sums over any set of countries stay exact
+        "inbound_share": share,
+        "weighted_readiness": view["procurement_readiness_score"] * share,
+        "opportunity_size": (volume * view["procurement_readiness_score"] / 100).round(0),
+    })
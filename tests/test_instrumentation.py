@@ -0,0 +1,27 @@
+"""Rerun monitors must time fragment runs, profiling only when no profiler is active."""
+
+from scripts.instrumentation import RerunMonitor, recent_events
+
+
+def busy():
+    return sum(i * i for i in range(10_000))
+
+
+def test_fragment_run_is_profiled_on_its_own():
+    monitor = RerunMonitor(profile=True, fragment="scenarios_tab")
+    busy()
+    report = monitor.finish()
+    assert "busy" in report
+    event = recent_events(1, "app_rerun")[0]
+    assert event["fragment"] == "scenarios_tab" and event["profiled"]
+
+
+def test_fragment_inside_profiled_rerun_is_only_timed():
+    rerun = RerunMonitor(profile=True)
+    fragment = RerunMonitor(profile=True, fragment="dashboard")
+    busy()
+    assert fragment.finish() is None
+    assert "busy" in rerun.finish()
+    fragment_event, rerun_event = recent_events(2, "app_rerun")[::-1]
+    assert fragment_event["fragment"] == "dashboard" and not fragment_event["profiled"]
+    assert rerun_event["fragment"] is None and rerun_event["profiled"]
@@ -0,0 +1,111 @@
+"""Incremental and streaming pipeline runs must produce the same outputs as a full run."""
+
+import shutil
+
+import pandas as pd
+import pytest
+
+from scripts.instrumentation import MAX_EVENTS, recent_events
+from scripts.pipeline import (
+    GOVERNANCE_FILE,
+    OPPORTUNITY_FILE,
+    computed_file_name,
+    input_files,
+    run_scoring_pipeline,
+)
+from scripts.synthetic_data import generate_dataset
+from scripts.views import TOURISM_VIEW_FILE
+
+
+ROWS = 2_000
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    return generate_dataset(tmp_path / "data", ROWS, n_countries=20)
+
+
+def outputs(data_path):
+    names = [computed_file_name(name) for name in input_files(data_path)] + [OPPORTUNITY_FILE, GOVERNANCE_FILE]
+    return {name: pd.read_csv(data_path / name) for name in names}
+
+
+def assert_same_outputs(actual_path, expected_path):
+    actual, expected = outputs(actual_path), outputs(expected_path)
+    assert actual.keys() == expected.keys()
+    for name in expected:
+        pd.testing.assert_frame_equal(actual[name], expected[name], obj=name)
+
+
+def full_run(data_path, tmp_path):
+    """Outputs of a forced, from-scratch run over a copy of data_path's inputs."""
+    fresh = tmp_path / "fresh"
+    shutil.rmtree(fresh, ignore_errors=True)
+    fresh.mkdir()
+    for name in input_files(data_path):
+        shutil.copy(data_path / name, fresh / name)
+    governance_df, _ = run_scoring_pipeline(force=True, workers=1, data_path=fresh)
+    assert governance_df is not None
+    return fresh
+
+
+def test_incremental_run_matches_full_run(data_path, tmp_path):
+    assert run_scoring_pipeline(workers=1, data_path=data_path)[0] is not None
+
+    aviation, tourism = (data_path / name for name in input_files(data_path))
+    df = pd.read_csv(aviation)
+    df.loc[:9, "ai_policy"] = ~df.loc[:9, "ai_policy"]  # changed rows
+    df.loc[10:19, "country_modifier"] = 1.2
+    df = pd.concat([df.drop(index=range(20, 40)), df.iloc[[0]].assign(country="New Country")])  # removed, added
+    df.to_csv(aviation, index=False)
+
+    governance_df, opportunity_df = run_scoring_pipeline(workers=1, data_path=data_path)
+    assert governance_df is not None and opportunity_df is not None
+    assert_same_outputs(data_path, full_run(data_path, tmp_path))
+
+
+def test_unchanged_inputs_are_a_noop(data_path):
+    run_scoring_pipeline(workers=1, data_path=data_path)
+    mtimes = {name: (data_path / name).stat().st_mtime_ns for name in outputs(data_path)}
+    governance_df, _ = run_scoring_pipeline(workers=1, data_path=data_path)
+    assert governance_df is not None
+    assert {name: (data_path / name).stat().st_mtime_ns for name in outputs(data_path)} == mtimes
+
+
+def test_noop_run_does_not_read_the_tourism_view(data_path):
+    run_scoring_pipeline(workers=1, data_path=data_path)
+    assert (data_path / TOURISM_VIEW_FILE).exists()
+    before = last_view_read()
+    assert run_scoring_pipeline(workers=1, data_path=data_path)[0] is not None
+    assert last_view_read() is before
+
+
+def last_view_read():
+    return next((e for e in recent_events(MAX_EVENTS, "read") if e.get("file") == TOURISM_VIEW_FILE), None)
+
+
+def test_streaming_run_matches_in_memory_run(data_path, tmp_path):
+    in_memory = full_run(data_path, tmp_path)
+    governance_df, opportunity_df = run_scoring_pipeline(force=True, chunk_size=300, workers=1, data_path=data_path)
+    assert governance_df is not None and opportunity_df is None
+    assert_same_outputs(data_path, in_memory)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failed_streaming_run_leaves_no_part_files(data_path, workers):
+    pd.DataFrame({"country": ["X"], "sector": ["Aviation"]}).to_csv(
+        data_path / "fact_bad_governance_flags.csv", index=False
+    )
+    assert run_scoring_pipeline(force=True, chunk_size=300, workers=workers, data_path=data_path) == (None, None)
+    assert not [path.name for path in data_path.iterdir() if path.name.endswith((".part", ".tmp"))]
+
+
+@pytest.mark.parametrize("chunk_size", [None, 300])
+def test_inputs_with_other_years_are_rejected(data_path, chunk_size):
+    aviation = data_path / input_files(data_path)[0]
+    df = pd.read_csv(aviation)
+    df.assign(year=2023).to_csv(aviation, index=False)
+    assert run_scoring_pipeline(force=True, chunk_size=chunk_size, workers=1, data_path=data_path)[0] is not None
+
+    df.assign(year=[2022] + [2023] * (len(df) - 1)).to_csv(aviation, index=False)
+    assert run_scoring_pipeline(force=True, chunk_size=chunk_size, workers=1, data_path=data_path) == (None, None)
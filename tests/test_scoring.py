@@ -0,0 +1,83 @@
+"""Vectorized scoring must match the scalar calculate_ai_procurement_index exactly."""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.scoring import (
+    FLAG_WEIGHTS,
+    SECTOR_SCORES,
+    _round_like_python,
+    calculate_ai_procurement_index,
+    score_frame,
+)
+
+
+def scalar_scores(df):
+    return np.array([
+        calculate_ai_procurement_index(
+            row["sector"],
+            {flag: bool(row[flag]) for flag in FLAG_WEIGHTS},
+            row["country_modifier"],
+        )
+        for row in df.to_dict("records")
+    ])
+
+
+def flags_frame(sectors, modifiers):
+    """Every (sector, flag combination, modifier) row."""
+    masks = range(1 << len(FLAG_WEIGHTS))
+    rows = [
+        {"sector": sector, **{flag: bool(mask >> bit & 1) for bit, flag in enumerate(FLAG_WEIGHTS)},
+         "country_modifier": modifier}
+        for sector, mask, modifier in itertools.product(sectors, masks, modifiers)
+    ]
+    return pd.DataFrame(rows)
+
+
+def test_random_rows_match_scalar():
+    rng = np.random.default_rng(0)
+    n = 20_000
+    df = pd.DataFrame({
+        "sector": rng.choice(list(SECTOR_SCORES) + ["Mining"], n),
+        **{flag: rng.random(n) < 0.5 for flag in FLAG_WEIGHTS},
+        "country_modifier": rng.uniform(0.5, 1.5, n).round(2),
+    })
+    np.testing.assert_array_equal(score_frame(df), scalar_scores(df))
+
+
+def test_half_way_values_match_scalar():
+    # A 0.001 modifier grid puts many products next to x.xxx5, where
+    # np.round and the builtin round can disagree
+    df = flags_frame(SECTOR_SCORES, np.round(np.arange(0.5, 1.5, 0.001), 3))
+    governance = sum(df[flag] * weight for flag, weight in FLAG_WEIGHTS.items())
+    scaled = df["sector"].map(SECTOR_SCORES) * governance * df["country_modifier"] * 1000
+    assert (np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6).any()
+    np.testing.assert_array_equal(score_frame(df), scalar_scores(df))
+
+
+@pytest.mark.parametrize("values", [
+    [0.0005, 0.0015, 0.0025, 0.2555, 1.2345, 2.675, -0.0005, -1.2345],
+    [0.1 + 0.2, 0.255, 0.2125, 0.6375, 0.85 * 0.3],
+])
+def test_round_like_python(values):
+    values = np.array(values)
+    np.testing.assert_array_equal(_round_like_python(values, 3), [round(float(v), 3) for v in values])
+
+
+def test_unknown_and_missing_sectors_use_default_score():
+    df = flags_frame(["Mining", None, np.nan], [1.0, 0.95])
+    np.testing.assert_array_equal(score_frame(df), scalar_scores(df))
+
+
+def test_categorical_sectors_match_object_sectors():
+    df = flags_frame(list(SECTOR_SCORES)[:3] + ["Mining", None], [0.9, 1.0, 1.1])
+    categorical = df.assign(sector=df["sector"].astype("category"))
+    expected = scalar_scores(df)
+    np.testing.assert_array_equal(score_frame(categorical), expected)
+    # Categories unused by the rows, and rows outside the categories (NaN codes)
+    categories = ["Aviation", "Health", "Unused"]
+    recoded = df.assign(sector=pd.Categorical(df["sector"].where(df["sector"].isin(categories)), categories))
+    np.testing.assert_array_equal(score_frame(recoded), scalar_scores(recoded.astype({"sector": object})))
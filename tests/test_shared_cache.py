@@ -0,0 +1,40 @@
+"""Frames memory-mapped from shared snapshots must index like freshly loaded ones."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.country_index import CountryIndex
+from scripts.shared_cache import SHARED_CACHE_ENABLED, country_slices, write_snapshot
+
+pytestmark = pytest.mark.skipif(not SHARED_CACHE_ENABLED, reason="shared cache needs pyarrow")
+
+
+def test_snapshot_slices_match_partitioned_copy(tmp_path):
+    rng = np.random.default_rng(0)
+    countries = ["Kenya", "Nigeria", "Ghana", "Egypt"]
+    df = pd.DataFrame({
+        "country": pd.Categorical(rng.choice(countries, 1_000)),
+        "year": rng.integers(2018, 2024, 1_000).astype("int16"),
+        "value": rng.random(1_000),
+    })
+    shared = write_snapshot(df, tmp_path / "flows.all.0.feather")
+    slices = country_slices(shared)
+    assert slices is not None
+
+    expected = CountryIndex({"flows": df})
+    actual = CountryIndex({"flows": shared}, {"flows": slices})
+    assert actual.countries == expected.countries
+    for country in countries:
+        pd.testing.assert_frame_equal(
+            actual.select("flows", country).reset_index(drop=True),
+            expected.select("flows", country).reset_index(drop=True),
+        )
+
+
+def test_derived_frames_have_no_slices(tmp_path):
+    df = pd.DataFrame({"country": ["Kenya", "Ghana", "Kenya"], "value": [1, 2, 3]})
+    shared = write_snapshot(df, tmp_path / "flows.all.0.feather")
+    assert country_slices(shared) == {"Kenya": slice(0, 2), "Ghana": slice(2, 3)}
+    assert country_slices(shared.iloc[1:]) is None
+    assert country_slices(df) is None
@@ -0,0 +1,75 @@
+"""The SQLite store must match the pipeline's CSV outputs, syncing only the rows that changed."""
+
+import pandas as pd
+import pytest
+
+import scripts.pipeline as pipeline
+from scripts.instrumentation import recent_events
+from scripts.pipeline import (
+    BASE_YEAR,
+    GOVERNANCE_FILE,
+    OPPORTUNITY_FILE,
+    computed_file_name,
+    input_files,
+    run_scoring_pipeline,
+)
+from scripts.sqlite_store import query
+from scripts.synthetic_data import generate_dataset
+
+
+@pytest.fixture
+def data_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "SQLITE_ENABLED", True)
+    return generate_dataset(tmp_path / "data", 2_000, n_countries=20)
+
+
+def sorted_rows(df, columns):
+    df = df[list(columns)].astype({col: str for col in columns if col in ("country", "sector", "governance_flag")})
+    return df.sort_values(list(columns), ignore_index=True)
+
+
+def assert_store_matches_outputs(data_path):
+    inputs = pd.concat(
+        [pd.read_csv(data_path / computed_file_name(name)) for name in input_files(data_path)], ignore_index=True
+    )
+    expected = {
+        "governance_inputs": inputs,
+        "opportunity_scores": pd.read_csv(data_path / OPPORTUNITY_FILE),
+        "governance_flags": pd.read_csv(data_path / GOVERNANCE_FILE),
+    }
+    for table, df in expected.items():
+        stored = query(data_path, table, BASE_YEAR)
+        columns = [col for col in stored.columns if col != "year"]
+        pd.testing.assert_frame_equal(
+            sorted_rows(stored, columns), sorted_rows(df, columns), check_dtype=False, obj=table
+        )
+
+
+def last_write():
+    return recent_events(stage_name="sqlite_write")[0]
+
+
+@pytest.mark.parametrize("chunk_size", [None, 300])
+def test_store_syncs_only_changed_rows(data_path, chunk_size):
+    assert run_scoring_pipeline(workers=1, chunk_size=chunk_size, data_path=data_path)[0] is not None
+    assert_store_matches_outputs(data_path)
+
+    aviation = data_path / input_files(data_path)[0]
+    df = pd.read_csv(aviation)
+    df.loc[5, "ai_policy"] = not df.loc[5, "ai_policy"]
+    df = pd.concat([df.drop(index=[0]), df.iloc[[1, 1]]])  # a removed row shifts every later row; a duplicate
+    df.to_csv(aviation, index=False)
+    assert run_scoring_pipeline(workers=1, chunk_size=chunk_size, data_path=data_path)[0] is not None
+
+    assert_store_matches_outputs(data_path)
+    write = last_write()
+    assert write["sources"] == 1
+    # Per table: the changed row (deleted and inserted), the removed row and the two duplicates
+    assert write["rows"] <= 2 * 5
+
+
+def test_unchanged_store_is_not_rewritten(data_path):
+    assert run_scoring_pipeline(workers=1, data_path=data_path)[0] is not None
+    write = last_write()
+    assert run_scoring_pipeline(workers=1, data_path=data_path)[0] is not None
+    assert last_write() == write
@@ -0,0 +1,29 @@
+"""Derived tourism view columns must add up to the metrics shown in the app."""
+
+import numpy as np
+import pandas as pd
+
+from scripts.views import build_tourism_view
+
+
+def test_weighted_readiness_recovers_each_countrys_readiness():
+    rng = np.random.default_rng(0)
+    countries = [f"Country {i:04d}" for i in range(5_000)]
+    inbound = pd.DataFrame({
+        "country": countries,
+        "inbound_year": 2023,
+        "inbound_tourists": rng.integers(1_000, 50_000_000, len(countries)),
+    })
+    scores = pd.DataFrame({
+        "country": countries,
+        "procurement_readiness_score": rng.uniform(0, 100, len(countries)).round(1),
+        "governance_flag": "HIGH",
+    })
+    view = build_tourism_view(inbound, scores, 2023)
+
+    np.testing.assert_allclose(
+        view["weighted_readiness"] / view["inbound_share"], view["procurement_readiness_score"], rtol=1e-12
+    )
+    assert np.isclose(view["inbound_share"].sum(), 1.0)
+    expected = np.average(scores["procurement_readiness_score"], weights=inbound["inbound_tourists"])
+    assert np.isclose(view["weighted_readiness"].sum(), expected)